@@ -0,0 +1,64 @@
+"""BatchSim throughput vs stepping the same games one by one.
+
+Before timing, every level's BatchSim (random walker, auto-restart) is
+checked against ``sim.run_headless()`` with the same seeds: ball, score,
+lives, timers and tiles must be identical after every run, so the
+vectorized ball physics and meltdown cannot drift from the scalar game.
+
+Run from the repository root:  python -m benchmarks.bench_batch
+"""
+import time
+
+from hazard.batch import BatchSim, RandomWalkPolicy
+from hazard.sim import run_headless
+
+LEVELS = (1, 3, 4, 5)
+CHECK_SEEDS = 12
+CHECK_TICKS = 3000
+GAMES = 256
+TICKS = 500
+
+
+def snapshot(state):
+    return (list(map(float, state.player_pos)), list(map(float, state.player_vel)),
+            state.score, state.level, state.lives, state.time_count, state.game_over,
+            state.falling, state.powerup_active, state.powerup_timer, state.crumble_timer,
+            bytes(state.map_data.cells))
+
+
+def run_batch(seeds, ticks, level):
+    sim = BatchSim(seeds, level=level)
+    policy = RandomWalkPolicy()
+    policy.reset(sim.states)
+    for tick in range(ticks):
+        sim.step(policy.act(sim.states, tick))
+    return sim.states
+
+
+def check_parity(level, seeds=CHECK_SEEDS, ticks=CHECK_TICKS):
+    for seed, state in zip(range(seeds), run_batch(range(seeds), ticks, level)):
+        reference, _ = run_headless(ticks, seed=seed, level=level)
+        assert snapshot(state) == snapshot(reference), f"level {level} seed {seed}: BatchSim differs"
+    print(f"BatchSim matches run_headless for {seeds} seeds x {ticks} ticks (level {level})")
+
+
+def bench(level):
+    start = time.perf_counter()
+    run_batch(range(GAMES), TICKS, level)
+    batched_rate = GAMES * TICKS / (time.perf_counter() - start)
+
+    sample = GAMES // 16
+    start = time.perf_counter()
+    for seed in range(sample):
+        run_headless(TICKS, seed=seed, level=level)
+    scalar_rate = sample * TICKS / (time.perf_counter() - start)
+
+    print(f"level {level} | BatchSim {batched_rate:10,.0f} instance-ticks/sec"
+          f" | one by one {scalar_rate:10,.0f} ticks/sec | x{batched_rate / scalar_rate:.1f}")
+
+
+if __name__ == "__main__":
+    for level in LEVELS:
+        check_parity(level)
+    for level in LEVELS:
+        bench(level)
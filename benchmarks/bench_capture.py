@@ -0,0 +1,86 @@
+"""Offscreen capture throughput: frames/sec at each stage of the pipeline.
+
+Plays one game (level 3, seek bot) and captures every tick with
+``hazard.capture``: drawing only, drawing plus ``glReadPixels`` into a
+pooled buffer, and full PNG/PPM capture with the writer thread. For
+comparison, "inline" encodes each PNG on the rendering thread, the way a
+capture loop without the writer would. Images go to a temporary directory.
+
+Needs an EGL-capable OpenGL driver (e.g. Mesa), but no display.
+
+Run from the repository root:  python -m benchmarks.bench_capture
+"""
+import tempfile
+import time
+
+import numpy as np
+
+from hazard.batch import SeekPolicy
+from hazard.capture import FrameWriter, ImageSequence, OffscreenRenderer, policy_driver
+from hazard.sim import GameState, init_map
+
+LEVEL = 3
+SEED = 7
+FRAMES = 180
+
+
+def new_game():
+    state = GameState(seed=SEED, level=LEVEL, verbose=False)
+    init_map(state)
+    return state, policy_driver(SeekPolicy(), state)
+
+
+def rate(renderer, run):
+    state, advance = new_game()
+    start = time.perf_counter()
+    run(state, advance)
+    renderer.finish()
+    return FRAMES / (time.perf_counter() - start)
+
+
+def bench(renderer):
+    def draw(state, advance):
+        for tick in range(FRAMES):
+            advance(state, tick)
+            renderer.draw(state)
+
+    def read(state, advance):
+        frame = np.empty(renderer.shape, dtype=np.uint8)
+        for tick in range(FRAMES):
+            advance(state, tick)
+            renderer.capture(state, frame)
+
+    def capture(fmt, buffers):
+        def run(state, advance):
+            with tempfile.TemporaryDirectory() as out:
+                writer = FrameWriter(ImageSequence(f'{out}/frame_%06d.{fmt}'), renderer.shape, buffers)
+                for tick in range(FRAMES):
+                    advance(state, tick)
+                    writer.submit(renderer.capture(state, writer.acquire()))
+                writer.close()
+                waits.append(writer.waits)
+        return run
+
+    def inline_png(state, advance):
+        with tempfile.TemporaryDirectory() as out:
+            sink = ImageSequence(f'{out}/frame_%06d.png')
+            frame = np.empty(renderer.shape, dtype=np.uint8)
+            for tick in range(FRAMES):
+                advance(state, tick)
+                sink.write(tick, renderer.capture(state, frame))
+
+    waits = []
+    print(f"{renderer.width}x{renderer.height}, {FRAMES} frames, level {LEVEL}")
+    for name, run in (('draw only', draw), ('draw + readback', read),
+                      ('PPM, writer thread', capture('ppm', 4)),
+                      ('PNG, writer thread', capture('png', 4)),
+                      ('PNG, inline', inline_png)):
+        line = f"  {name:<20} {rate(renderer, run):7.1f} frames/sec"
+        if 'thread' in name:
+            line += f"  (render waited for the writer {waits[-1]} times)"
+        print(line)
+
+
+if __name__ == "__main__":
+    renderer = OffscreenRenderer()
+    bench(renderer)
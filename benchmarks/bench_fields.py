@@ -0,0 +1,111 @@
+"""Per-map fields: incremental updates vs rebuilding from scratch.
+
+Before timing, random maps (holes, obstacles, diamonds) lose their cells
+one by one in random order: floor crumbles to a hole, a diamond is picked
+up. After every loss the incrementally updated fields must equal ones
+built from scratch:
+
+* ``HazardField``: hole distances, region labels (min flat index of each
+  region, so split-off pieces are caught) and the safe floor index.
+* ``FlowField`` towards the diamonds: distances, and a ``next`` step that
+  leads one cell closer (ties may be broken differently than a rebuild).
+
+Run from the repository root:  python -m benchmarks.bench_fields
+"""
+import time
+
+import numpy as np
+
+from hazard.field import HazardField
+from hazard.grid import DIAMOND, FLOOR, HOLE, OBSTACLE, TileGrid
+from hazard.nav import FlowField
+
+CELL = 50
+CHECK_SIZES = (8, 16, 48)
+CHECK_SEEDS = 30
+CHECK_LOSSES = 300 # Per map, at most
+SIZES = (48, 192, 480)
+LOSSES = 500
+
+
+def random_grid(size, rng):
+    tiles = np.full((size, size), FLOOR, dtype=np.uint8)
+    roll = rng.random((size, size))
+    tiles[roll < 0.05] = HOLE
+    tiles[(roll >= 0.05) & (roll < 0.13)] = OBSTACLE
+    tiles[(roll >= 0.13) & (roll < 0.15)] = DIAMOND
+    return TileGrid(size * CELL // 2, CELL, bytearray(tiles.tobytes()))
+
+
+def lose_order(grid, rng):
+    # Every walkable cell, once, in random order, with what it turns into
+    # (a picked-up diamond leaves floor, anything else crumbles)
+    cells = np.flatnonzero(np.isin(grid.array.reshape(-1), (HOLE, OBSTACLE), invert=True))
+    rng.shuffle(cells)
+    return [(i, FLOOR if grid.cells[i] == DIAMOND else HOLE) for i in cells.tolist()]
+
+
+def check_field(field):
+    fresh = HazardField(field.grid)
+    assert np.array_equal(field.dist, fresh.dist), "hole distances differ from a rebuild"
+    assert np.array_equal(field.labels, fresh.labels), "region labels differ from a rebuild"
+    floor = np.flatnonzero(field.grid.array.reshape(-1) == FLOOR).tolist()
+    assert len(field.safe) == len(floor) and all(i in field.safe for i in floor), \
+        "safe floor index differs from a rebuild"
+
+
+def check_nav(nav):
+    fresh = FlowField(nav.grid, nav.goal_type)
+    assert np.array_equal(nav.dist, fresh.dist), "route distances differ from a rebuild"
+    assert np.array_equal(nav.next < 0, fresh.next < 0), "cells with a next step differ from a rebuild"
+    steps = np.flatnonzero(nav.next >= 0)
+    size = nav.grid.size
+    a, b = np.divmod(steps, size), np.divmod(nav.next[steps], size)
+    assert np.all(abs(a[0] - b[0]) + abs(a[1] - b[1]) == 1), "next step is not a neighbour"
+    assert np.all(nav.dist[nav.next[steps]] == nav.dist[steps] - 1), "next step is not one cell closer"
+
+
+def check_updates(size, seed):
+    rng = np.random.default_rng(seed)
+    grid = random_grid(size, rng)
+    field = HazardField(grid)
+    nav = FlowField(grid, DIAMOND)
+    for i, tile_type in lose_order(grid, rng)[:CHECK_LOSSES]:
+        grid.set_index(i, tile_type)
+        field.update(i)
+        nav.update(i)
+        check_field(field)
+        check_nav(nav)
+
+
+def bench(size):
+    rng = np.random.default_rng(size)
+    grid = random_grid(size, rng)
+    lost = lose_order(grid, rng)[:LOSSES]
+    line = f"{size:>4}x{size:<4}"
+    for name, build in (('hazard field', HazardField), ('flow field', lambda g: FlowField(g, DIAMOND))):
+        work = TileGrid(grid.half_length, CELL, bytearray(grid.cells))
+        field = build(work)
+        start = time.perf_counter()
+        for i, tile_type in lost:
+            work.set_index(i, tile_type)
+            field.update(i)
+        update_ms = (time.perf_counter() - start) / len(lost) * 1e3
+
+        repeats = max(3, 2000 // size)
+        start = time.perf_counter()
+        for _ in range(repeats):
+            build(work)
+        rebuild_ms = (time.perf_counter() - start) / repeats * 1e3
+        line += f" | {name} update {update_ms:7.3f} ms/cell, rebuild {rebuild_ms:8.3f} ms"
+    print(line)
+
+
+if __name__ == "__main__":
+    for size in CHECK_SIZES:
+        for seed in range(CHECK_SEEDS):
+            check_updates(size, seed)
+    print(f"Hazard and flow fields match a rebuild after every lost cell "
+          f"({CHECK_SEEDS} seeds on {', '.join(f'{s}x{s}' for s in CHECK_SIZES)} grids)")
+    for size in SIZES:
+        bench(size)
@@ -0,0 +1,107 @@
+"""Replay-driven benchmark suite: one canned recording per level.
+
+Each recording in ``benchmarks/replays`` fixes the seed and every tick's
+input, so runs are comparable across changes to the hot paths. Reports
+ticks/sec, per-tick p50/p95/p99 and peak traced memory (level generation
+included). ``--rendered`` also plays each recording in the GLUT window with
+``--profile`` and reports showScreen frame times (needs a display).
+
+Run from the repository root:  python -m benchmarks.bench_replay
+Rebuild the recordings (after a deliberate gameplay change):
+    python -m benchmarks.bench_replay --regenerate
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from hazard.profiler import percentile
+from hazard.replay import Recorder, Recording, Replayer
+from hazard.sim import run_headless
+
+REPLAY_DIR = os.path.join(os.path.dirname(__file__), 'replays')
+LEVELS = (1, 2, 3, 4, 5)
+SEED = 2024
+TICKS = 6000 # 100 s of play at the default tick rate
+
+
+def replay_path(level):
+    return os.path.join(REPLAY_DIR, f'level{level}.hzr')
+
+
+def regenerate():
+    os.makedirs(REPLAY_DIR, exist_ok=True)
+    for level in LEVELS:
+        recorder = Recorder()
+        run_headless(TICKS, seed=SEED, level=level, recorder=recorder)
+        recorder.save(replay_path(level))
+        print(f"wrote {replay_path(level)}")
+
+
+def bench_headless(recording):
+    state = recording.new_state()
+    replayer = Replayer(recording)
+    clock = time.perf_counter_ns
+    tick_ns = []
+    start = clock()
+    while not replayer.done:
+        t0 = clock()
+        replayer.step(state)
+        tick_ns.append(clock() - t0)
+    elapsed = (clock() - start) / 1e9
+    tick_ns.sort()
+
+    # Separate pass: tracemalloc slows allocation-heavy code down a lot
+    tracemalloc.start()
+    state = recording.new_state()
+    replayer = Replayer(recording)
+    while not replayer.done:
+        replayer.step(state)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, tick_ns, peak
+
+
+def bench_rendered(path):
+    """showScreen frame-time stats from a windowed replay under --profile."""
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    fd, out = tempfile.mkstemp(suffix='.json')
+    os.close(fd)
+    try:
+        subprocess.run([sys.executable, os.path.join(root, 'hazardball.py'), '--replay', path,
+                        '--profile', out], check=True, stdout=subprocess.DEVNULL)
+        with open(out) as f:
+            return json.load(f).get('showScreen')
+    finally:
+        os.remove(out)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--regenerate", action="store_true", help="re-record the canned replays")
+    parser.add_argument("--rendered", action="store_true",
+                        help="also measure frame times in the GLUT window")
+    args = parser.parse_args()
+    if args.regenerate:
+        regenerate()
+
+    for level in LEVELS:
+        recording = Recording.load(replay_path(level))
+        elapsed, tick_ns, peak = bench_headless(recording)
+        line = (f"level {level} | {recording.ticks / elapsed:8.0f} ticks/sec"
+                f" | tick p50/p95/p99 {percentile(tick_ns, 50) / 1e3:6.1f}/"
+                f"{percentile(tick_ns, 95) / 1e3:6.1f}/{percentile(tick_ns, 99) / 1e3:6.1f} us"
+                f" | peak {peak / 2**20:6.2f} MiB")
+        if args.rendered:
+            frames = bench_rendered(replay_path(level))
+            line += (f" | frame p50/p95/p99 {frames['p50_ms']:.2f}/{frames['p95_ms']:.2f}/"
+                     f"{frames['p99_ms']:.2f} ms")
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""Ray sensor throughput: batched RaySensor vs per-ray, per-cell Python lookups.
+
+Casts RAYS rays per game from every game of a BatchSim (level 3: holes,
+obstacles and moving objects) and reports rays/sec. The per-ray version
+walks each ray with ``collide.traverse()`` and checks every moving object
+in turn; its readings must match the batched ones.
+
+Run from the repository root:  python -m benchmarks.bench_sensors
+"""
+import math
+import random
+import time
+
+import numpy as np
+
+from hazard.batch import BatchSim
+from hazard.collide import traverse
+from hazard.sensors import RaySensor
+
+RAYS = 32
+LEVEL = 3
+WARMUP_TICKS = 120
+
+
+def slab(ox, oy, dx, dy, x0, y0, x1, y1):
+    t_near, t_far = -math.inf, math.inf
+    for o, d, lo, hi in ((ox, dx, x0, x1), (oy, dy, y0, y1)):
+        if d == 0:
+            if not lo <= o <= hi:
+                return math.inf
+            continue
+        ta, tb = sorted(((lo - o) / d, (hi - o) / d))
+        t_near, t_far = max(t_near, ta), min(t_far, tb)
+    return max(t_near, 0.0) if t_near <= t_far and t_far >= 0 else math.inf
+
+
+def per_ray_sense(sensor, state):
+    grid = state.map_data
+    movers = state.moving_objects
+    out = np.ones(sensor.shape, dtype=np.float32)
+    x, y = state.player_pos[0], state.player_pos[1]
+    for k, (dx, dy) in enumerate(sensor.directions.tolist()):
+        hole = obstacle = math.inf
+        for cell, t_enter, _ in traverse(grid, x, y, dx, dy, sensor.max_dist):
+            if t_enter >= sensor.max_dist:
+                break
+            tile = grid.cells[cell] if cell >= 0 else None
+            if tile == 1 and hole == math.inf:
+                hole = t_enter
+            if tile == 2 or (tile is None and not state.endless):
+                obstacle = t_enter
+                break
+        wall = math.inf
+        for (ox, oy), kind in zip(movers.pos.tolist(), movers.kind.tolist()):
+            t = slab(x, y, dx, dy, ox, oy, ox + grid.cell_size, oy + grid.cell_size)
+            if kind == 1:
+                hole = min(hole, t)
+            else:
+                wall = min(wall, t)
+        for channel, t in enumerate((hole, obstacle, wall)):
+            if t <= obstacle:
+                out[k, channel] = min(t / sensor.max_dist, 1.0)
+    return out
+
+
+def bench(games):
+    sim = BatchSim(range(games), level=LEVEL)
+    walker = random.Random(games)
+    for tick in range(WARMUP_TICKS): # Spread the balls out
+        sim.step([(walker.choice((b'w', b'a', b's', b'd')),) if tick % 15 == 0 else ()
+                  for _ in range(games)])
+    sensor = RaySensor(RAYS)
+    rays = games * RAYS
+
+    repeats = max(3, 20000 // rays)
+    start = time.perf_counter()
+    for _ in range(repeats):
+        batched = sensor.sense_batch(sim.states)
+    batched_rate = rays * repeats / (time.perf_counter() - start)
+
+    sample = sim.states[:min(games, 16)]
+    start = time.perf_counter()
+    reference = np.stack([per_ray_sense(sensor, state) for state in sample])
+    per_ray_rate = len(sample) * RAYS / (time.perf_counter() - start)
+    assert np.allclose(batched[:len(sample)], reference, atol=1e-5), "batched and per-ray readings differ"
+
+    print(f"{games:>5} games x {RAYS} rays | batched {batched_rate:12,.0f} rays/sec"
+          f" | per-ray {per_ray_rate:10,.0f} rays/sec | x{batched_rate / per_ray_rate:.0f}")
+
+
+if __name__ == "__main__":
+    for games in (1, 16, 256, 1024):
+        bench(games)
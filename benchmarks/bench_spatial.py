@@ -0,0 +1,140 @@
+"""Moving-object collision query: SpatialHash vs the old linear scan.
+
+Before timing, seeded level 3 games (single and BatchSim) are stepped with
+the game's own MOVER_BUCKET_SIZE index and every tick's index is checked
+against a linear scan, so stale buckets fail loudly.
+
+Run from the repository root:  python -m benchmarks.bench_spatial
+"""
+import random
+import time
+
+import numpy as np
+
+from hazard.batch import BatchSim
+from hazard.sim import GRID_CELL_SIZE, GameState, init_map, step
+from hazard.spatial import SpatialHash
+
+CELL = 50
+TICKS = 2000
+
+
+def make_objects(count, half_length, rng):
+    objects = []
+    for _ in range(count):
+        axis = rng.randrange(2)
+        x = rng.randrange(-half_length, half_length, CELL)
+        y = rng.randrange(-half_length, half_length, CELL)
+        start = x if axis == 0 else y
+        objects.append({'pos': [float(x), float(y)], 'axis': axis,
+                        'range': [start - 200, start + 200], 'vel': 2.0})
+    return objects
+
+
+def advance(objects):
+    for obj in objects:
+        a = obj['axis']
+        obj['pos'][a] += obj['vel']
+        if obj['pos'][a] > obj['range'][1] or obj['pos'][a] < obj['range'][0]:
+            obj['vel'] *= -1
+
+
+def linear_hits(objects, px, py):
+    hits = 0
+    for obj in objects:
+        ox, oy = obj['pos']
+        if ox < px < ox + CELL and oy < py < oy + CELL:
+            hits += 1
+    return hits
+
+
+def indexed_hits(index, objects, px, py):
+    hits = 0
+    for i in index.query_point(px, py):
+        ox, oy = objects[i]['pos']
+        if ox < px < ox + CELL and oy < py < oy + CELL:
+            hits += 1
+    return hits
+
+
+def check_index(state, probes):
+    # Every object overlapping a probe (or the ball) must be in that probe's bucket
+    pos = state.moving_objects.pos
+    index = state.mover_index
+    for px, py in probes + [tuple(state.player_pos[:2])]:
+        inside = ((pos[:, 0] < px) & (px < pos[:, 0] + GRID_CELL_SIZE) &
+                  (pos[:, 1] < py) & (py < pos[:, 1] + GRID_CELL_SIZE))
+        found = set(index.query_point(px, py))
+        missing = set(np.flatnonzero(inside).tolist()) - found
+        assert not missing, f"movers {sorted(missing)} missing from the bucket at ({px:.0f}, {py:.0f})"
+
+
+def check_games(seed=3, ticks=TICKS, level=3):
+    rng = random.Random(seed)
+    moves = (b'w', b'a', b's', b'd')
+    state = GameState(seed=seed, level=level, verbose=False)
+    init_map(state)
+    batch = BatchSim(range(seed, seed + 4), level=level)
+    half = state.grid_length
+    for tick in range(ticks):
+        step(state, (rng.choice(moves),) if tick % 15 == 0 else ())
+        batch.step([(rng.choice(moves),) if tick % 15 == 0 else () for _ in batch.states])
+        probes = [(rng.uniform(-half, half), rng.uniform(-half, half)) for _ in range(20)]
+        for game in [state] + batch.states:
+            check_index(game, probes)
+    print(f"Index matches a linear scan for {ticks} ticks (level {level}, single game and BatchSim)")
+
+
+def bench(count):
+    # Keep density roughly constant: ~2.5% of cells hold a mover, like levels 3-5
+    half_length = max(600, int((count / 0.025) ** 0.5 * CELL / 2) // CELL * CELL)
+    rng = random.Random(count)
+    objects = make_objects(count, half_length, rng)
+    probes = [(rng.uniform(-half_length, half_length), rng.uniform(-half_length, half_length))
+              for _ in range(TICKS)]
+
+    start = time.perf_counter()
+    linear_total = 0
+    for px, py in probes:
+        linear_total += linear_hits(objects, px, py)
+    linear_query = time.perf_counter() - start
+
+    index = SpatialHash(CELL)
+    for i, obj in enumerate(objects):
+        index.insert(i, obj['pos'][0], obj['pos'][1], CELL)
+    start = time.perf_counter()
+    indexed_total = 0
+    for px, py in probes:
+        indexed_total += indexed_hits(index, objects, px, py)
+    indexed_query = time.perf_counter() - start
+    assert indexed_total == linear_total
+
+    # Incremental maintenance cost on top of the existing per-tick movement
+    ticks = max(10, TICKS * 100 // count)
+    start = time.perf_counter()
+    for _ in range(ticks):
+        advance(objects)
+    advance_only = (time.perf_counter() - start) / ticks
+
+    start = time.perf_counter()
+    for _ in range(ticks):
+        for i, obj in enumerate(objects):
+            a = obj['axis']
+            old = obj['pos'][a]
+            obj['pos'][a] += obj['vel']
+            if obj['pos'][a] > obj['range'][1] or obj['pos'][a] < obj['range'][0]:
+                obj['vel'] *= -1
+            if old // CELL != obj['pos'][a] // CELL:
+                index.move(i, obj['pos'][0], obj['pos'][1])
+    with_index = (time.perf_counter() - start) / ticks
+
+    print(f"{count:>6} objects | linear {linear_query / TICKS * 1e6:9.1f} us/query"
+          f" | indexed {indexed_query / TICKS * 1e6:6.2f} us/query"
+          f" | update {advance_only * 1e3:6.2f} ms/tick"
+          f" (+index {with_index * 1e3:6.2f} ms/tick)")
+
+
+if __name__ == "__main__":
+    check_games()
+    for count in (100, 1000, 10000):
+        bench(count)
@@ -0,0 +1,76 @@
+"""Cold start of the non-graphical entry points, against a time budget.
+
+Each case runs in a fresh interpreter (median of REPEATS runs) and is
+reported on top of a bare ``python -c pass``. Importing ``hazardball`` must
+not pull in PyOpenGL. Exits with status 1 if a case is over its budget, so
+it can gate CI.
+
+Run from the repository root:  python -m benchmarks.bench_startup
+Add ``--importtime`` to list the slowest imports behind ``import hazardball``.
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+REPEATS = 5
+
+# name -> (python arguments, budget in ms above interpreter startup)
+CASES = {
+    'import hazard.sim': (['-c', 'import hazard.sim'], 250),
+    'import hazardball': (['-c', 'import sys, hazardball; '
+                                 'sys.exit(any(m.startswith("OpenGL") for m in sys.modules))'], 250),
+    'headless, 1 tick': (['hazardball.py', '--headless', '--ticks', '1', '--seed', '1'], 350),
+    'analysis, 1 map': (['-m', 'hazard.analysis', '--levels', '1', '--seeds', '1', '--jobs', '1'], 350),
+}
+
+
+def cold_start_ms(args):
+    times = []
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        result = subprocess.run([sys.executable] + args, cwd=ROOT, stdout=subprocess.DEVNULL)
+        times.append((time.perf_counter() - start) * 1e3)
+        if result.returncode:
+            raise SystemExit(f"{' '.join(args)} exited with status {result.returncode}")
+    return statistics.median(times)
+
+
+def slowest_imports(count=12):
+    # -X importtime lines: "import time: self [us] | cumulative | name"
+    err = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import hazardball'],
+                         cwd=ROOT, capture_output=True, text=True).stderr
+    rows = []
+    for line in err.splitlines()[1:]:
+        _, self_us, cumulative_us, name = line.replace('|', ':').split(':')
+        rows.append((int(cumulative_us), name.rstrip()))
+    for cumulative_us, name in sorted(rows, reverse=True)[:count]:
+        print(f"  {cumulative_us / 1e3:8.1f} ms  {name}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure cold start against the budget")
+    parser.add_argument("--importtime", action="store_true", help="list the slowest imports")
+    args = parser.parse_args()
+
+    base = cold_start_ms(['-c', 'pass'])
+    print(f"{'python -c pass':<20} {base:7.1f} ms (subtracted below)")
+    over = []
+    for name, (case_args, budget) in CASES.items():
+        ms = cold_start_ms(case_args) - base
+        status = 'ok' if ms <= budget else 'OVER BUDGET'
+        print(f"{name:<20} {ms:7.1f} ms  budget {budget:4d} ms  {status}")
+        if ms > budget:
+            over.append(name)
+    if args.importtime:
+        print("Slowest imports behind 'import hazardball' (cumulative):")
+        slowest_imports()
+    if over:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
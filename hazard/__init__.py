@@ -0,0 +1,6 @@
+"""Hazard Ball game modules.
+
+``hazard.sim`` holds the render-free game logic and ``hazard.render`` the
+GLUT front end (``hazard.capture`` draws the same scene offscreen);
+``hazardball.py`` at the repository root is the command line.
+"""
@@ -0,0 +1,145 @@
+"""Offline level solvability and difficulty analysis.
+
+For each seed the first map of a game is generated exactly as ``init_map()``
+would, and a 4-connected BFS over the walkable tiles (everything except
+holes and obstacles) from the safe zone finds which diamonds and whether
+the portal can be reached. Moving objects and the Level 5 crumble are
+dynamic and not part of the tile graph; the mover count feeds the
+difficulty score instead.
+
+Run over many seeds on all cores and write a CSV report:
+
+    python -m hazard.analysis --levels 1-5 --seeds 5000 --out report.csv
+"""
+import argparse
+import csv
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from hazard.grid import HOLE, OBSTACLE, DIAMOND, PORTAL
+from hazard.levelgen import SAFE_ZONE, generate_level, level_seed
+from hazard.nav import bfs_distances, neighbours_any
+from hazard.sim import GRID_CELL_SIZE, GRID_LENGTH
+
+DIAMONDS_NEEDED = 5
+
+# difficulty = 100 * weighted sum of components in [0, 1]
+DIFFICULTY_WEIGHTS = {
+    'route': 0.4,          # BFS cells to the 5th diamond plus to the portal, per 2 arena widths
+    'hole_adjacency': 0.4, # Share of reachable cells next to a hole
+    'movers': 0.2,         # Moving objects per reachable cell, 5% saturates
+}
+
+FIELDS = ('level', 'seed', 'solvable', 'reachable_diamonds', 'total_diamonds', 'portal_dist',
+          'diamond_dist', 'reachable_frac', 'hole_adjacency', 'movers', 'difficulty')
+
+
+def analyze_level(level, seed, half_length=GRID_LENGTH, cell_size=GRID_CELL_SIZE):
+    """Report (dict with FIELDS) for the first map of a game started with ``seed`` at ``level``."""
+    lvl = generate_level(level, level_seed(seed, 0), half_length, cell_size)
+    tiles = lvl.tiles
+    size = tiles.shape[0]
+    coords = np.arange(-half_length, half_length, cell_size)
+    safe = ((np.abs(coords)[np.newaxis, :] < SAFE_ZONE) &
+            (np.abs(coords)[:, np.newaxis] < SAFE_ZONE))
+
+    holes = tiles == HOLE
+    walkable = ~holes & (tiles != OBSTACLE)
+    dist = bfs_distances(walkable, safe)
+    reachable = dist >= 0
+
+    diamond_dists = np.sort(dist[(tiles == DIAMOND) & reachable])
+    portal_dists = dist[(tiles == PORTAL) & reachable]
+    solvable = len(diamond_dists) >= DIAMONDS_NEEDED and len(portal_dists) > 0
+    diamond_dist = int(diamond_dists[DIAMONDS_NEEDED - 1]) if len(diamond_dists) >= DIAMONDS_NEEDED else -1
+    portal_dist = int(portal_dists.min()) if len(portal_dists) else -1
+
+    n_reachable = int(reachable.sum())
+    hole_adjacency = float((neighbours_any(holes) & reachable).sum() / max(n_reachable, 1))
+    components = {
+        'route': min(1.0, (max(diamond_dist, 0) + max(portal_dist, 0)) / (2.0 * size)),
+        'hole_adjacency': hole_adjacency,
+        'movers': min(1.0, len(lvl.moving_objects) / max(n_reachable, 1) / 0.05),
+    }
+    difficulty = 100.0 * sum(DIFFICULTY_WEIGHTS[k] * v for k, v in components.items())
+
+    return {
+        'level': level,
+        'seed': seed,
+        'solvable': solvable,
+        'reachable_diamonds': len(diamond_dists),
+        'total_diamonds': int((tiles == DIAMOND).sum()),
+        'portal_dist': portal_dist,
+        'diamond_dist': diamond_dist,
+        'reachable_frac': n_reachable / float(size * size),
+        'hole_adjacency': hole_adjacency,
+        'movers': len(lvl.moving_objects),
+        'difficulty': difficulty,
+    }
+
+
+def _analyze(args):
+    return analyze_level(*args)
+
+
+def analyze_seeds(levels, seeds, half_length=GRID_LENGTH, jobs=None):
+    """Reports for every (level, seed) pair, computed on ``jobs`` processes (default: all cores)."""
+    tasks = [(level, seed, half_length) for level in levels for seed in seeds]
+    jobs = jobs or os.cpu_count() or 1
+    if jobs == 1:
+        return [_analyze(task) for task in tasks]
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        return list(pool.map(_analyze, tasks, chunksize=max(1, len(tasks) // (jobs * 8))))
+
+
+def summarize(reports):
+    """Per-level summary lines: solvable share and difficulty percentiles of solvable maps."""
+    lines = []
+    for level in sorted({r['level'] for r in reports}):
+        rows = [r for r in reports if r['level'] == level]
+        ok = [r for r in rows if r['solvable']]
+        line = f"level {level}: {len(ok)}/{len(rows)} solvable ({100.0 * len(ok) / len(rows):.1f}%)"
+        if ok:
+            p10, p50, p90 = np.percentile([r['difficulty'] for r in ok], (10, 50, 90))
+            easiest = sorted(ok, key=lambda r: r['difficulty'])[:5]
+            line += (f" | difficulty p10/p50/p90 {p10:.1f}/{p50:.1f}/{p90:.1f}"
+                     f" | easiest seeds {', '.join(str(r['seed']) for r in easiest)}")
+        lines.append(line)
+    return lines
+
+
+def parse_levels(text):
+    # "1-5" or "1,3,5"
+    if '-' in text:
+        first, last = text.split('-')
+        return list(range(int(first), int(last) + 1))
+    return [int(part) for part in text.split(',')]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check generated levels for solvability and difficulty")
+    parser.add_argument("--levels", type=parse_levels, default=[1, 2, 3, 4, 5],
+                        help="levels to analyse, e.g. 1-5 or 1,3")
+    parser.add_argument("--seeds", type=int, default=1000, help="number of game seeds per level")
+    parser.add_argument("--first-seed", type=int, default=0)
+    parser.add_argument("--grid-length", type=int, default=GRID_LENGTH)
+    parser.add_argument("--jobs", type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument("--out", default=None, help="write one CSV row per (level, seed)")
+    args = parser.parse_args()
+
+    seeds = range(args.first_seed, args.first_seed + args.seeds)
+    reports = analyze_seeds(args.levels, seeds, args.grid_length, args.jobs)
+    for line in summarize(reports):
+        print(line)
+    if args.out:
+        with open(args.out, 'w', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=FIELDS)
+            writer.writeheader()
+            writer.writerows(reports)
+        print(f"Report written to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,432 @@
+"""Many independent games per process for bots, balancing and load tests.
+
+``BatchSim`` hosts N games and steps them in lockstep. The per-tick state
+of every game lives in batch arrays, one row per game: ball position and
+velocity, falling / game-over / power-up flags and timers, level and
+crumble timer, and the tiles (each ``map_data.cells`` is a view of its
+row). The games are ``BatchedState`` objects whose attributes read and
+write those rows, so inputs, restarts and everything else in
+``hazard.sim`` work on them unchanged.
+
+A tick integrates every ball at once (friction, power-up timers, falling,
+arena walls). Only games whose ball could touch anything but floor, or sits
+in a moving object, go through the scalar ``sim.check_collisions()``;
+results match stepping each game alone. The moving walls and holes of all
+games share one ``MovingObjects`` batch (each game's ``moving_objects`` is
+a view, repacked when a game loads a new map) and advance in one update.
+
+``run_parallel()`` spreads instance shards over a process pool. Bots plug
+in through ``Policy``.
+
+    python -m hazard.batch --instances 512 --ticks 2000 --level 3
+"""
+import argparse
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from hazard.grid import FLOOR
+from hazard.movers import MovingObjects
+from hazard.sim import (BASE_TICK_RATE, GRID_CELL_SIZE, GRID_LENGTH, MOVER_BUCKET_SIZE, GameState,
+                        apply_input, ball_radius, check_collisions, collide_movers, crumble,
+                        end_powerup, fell_out, friction, gravity, init_map, nav_field, restart)
+
+
+class Policy:
+    """Bot interface: called once per tick with every game's state."""
+
+    def reset(self, states):
+        pass
+
+    def act(self, states, tick):
+        """One tuple of key presses (e.g. ``(b'w',)``) per game."""
+        raise NotImplementedError
+
+
+class IdlePolicy(Policy):
+    def act(self, states, tick):
+        return [()] * len(states)
+
+
+class RandomWalkPolicy(Policy):
+    """The ``run_headless()`` walker: a random move key every quarter second per game."""
+
+    moves = (b'w', b'a', b's', b'd')
+
+    def reset(self, states):
+        self.walkers = [random.Random(state.seed) for state in states]
+        self.press_every = max(1, states[0].tick_rate // 4) if states else 1
+
+    def act(self, states, tick):
+        if tick % self.press_every:
+            return [()] * len(states)
+        return [(walker.choice(self.moves),) for walker in self.walkers]
+
+
+class SeekPolicy(Policy):
+    """Follows each game's nav_field() towards the next diamond (or the open portal)."""
+
+    def reset(self, states):
+        self.press_every = max(1, states[0].tick_rate // 4) if states else 1
+
+    def act(self, states, tick):
+        if tick % self.press_every:
+            return [()] * len(states)
+        keys = []
+        for state in states:
+            x, y = state.player_pos[0], state.player_pos[1]
+            route = nav_field(state).route(x, y, max_cells=1)
+            if not route:
+                keys.append(())
+                continue
+            # Steer along the axis with the larger gap, against the current drift
+            dx = route[0][0] - x - state.player_vel[0] * 10
+            dy = route[0][1] - y - state.player_vel[1] * 10
+            if abs(dx) >= abs(dy):
+                keys.append((b'w' if dx > 0 else b's',))
+            else:
+                keys.append((b'a' if dy > 0 else b'd',))
+        return keys
+
+
+POLICIES = {'idle': IdlePolicy, 'random': RandomWalkPolicy, 'seek': SeekPolicy}
+
+
+class _Column:
+    # GameState attribute stored in row ``_slot`` of a BatchSim array (named
+    # like the attribute unless ``array`` is given)
+    def __init__(self, array=None):
+        self.name = array
+
+    def __set_name__(self, owner, name):
+        self.name = self.name or name
+
+    def __get__(self, state, owner=None):
+        if state is None:
+            return self
+        return getattr(state._batch, self.name)[state._slot].item()
+
+    def __set__(self, state, value):
+        getattr(state._batch, self.name)[state._slot] = value
+
+
+class _Vector(_Column):
+    # Like _Column, but reads return the writable row itself (pos[0] += ...)
+    def __get__(self, state, owner=None):
+        if state is None:
+            return self
+        return getattr(state._batch, self.name)[state._slot]
+
+
+class MoverBuckets:
+    """``SpatialHash.query_point()`` answered from the current mover positions.
+
+    Gives the same ids as an up-to-date ``SpatialHash(MOVER_BUCKET_SIZE)``,
+    so a batch never spends a Python call per re-bucketed object; only the
+    few games that reach the scalar collision code ask.
+    """
+
+    def __init__(self, state):
+        self.state = state
+
+    def query_point(self, x, y):
+        pos = self.state.moving_objects.pos
+        if not len(pos):
+            return []
+        b = MOVER_BUCKET_SIZE
+        col, row = x // b, y // b
+        lo = pos // b
+        hi = (pos + GRID_CELL_SIZE) // b
+        return np.flatnonzero((lo[:, 0] <= col) & (col <= hi[:, 0]) &
+                              (lo[:, 1] <= row) & (row <= hi[:, 1])).tolist()
+
+
+class BatchedState(GameState):
+    """A GameState whose ball, flags and tiles live in rows of its BatchSim's arrays.
+
+    The ``hazard.sim`` functions work on it unchanged; assigning a new
+    ``player_pos`` or ``map_data`` copies into the batch row. Moving objects
+    are looked up through ``MoverBuckets``.
+    """
+
+    player_pos = _Vector()
+    player_vel = _Vector()
+    time_count = _Column()
+    game_over = _Column()
+    falling = _Column()
+    powerup_active = _Column()
+    powerup_timer = _Column()
+    level = _Column('levels')
+    crumble_timer = _Column()
+
+    def __init__(self, batch, slot, **kwargs):
+        self._batch = batch
+        self._slot = slot
+        super().__init__(**kwargs)
+        self.mover_index = MoverBuckets(self)
+
+    def index_movers(self):
+        pass # MoverBuckets reads the positions directly
+
+    @property
+    def map_data(self):
+        return self._batch.grids[self._slot]
+
+    @map_data.setter
+    def map_data(self, grid):
+        self._batch.bind_grid(self._slot, grid)
+
+
+class BatchSim:
+    def __init__(self, seeds, level=1, grid_length=GRID_LENGTH, tick_rate=BASE_TICK_RATE,
+                 endless=False, auto_restart=True):
+        seeds = list(seeds)
+        n = len(seeds)
+        self.level = level
+        self.auto_restart = auto_restart # Restart at ``level`` on game over, like run_headless()
+        self.endless = endless
+        # Per-instance state (BatchedState attributes), one row per game
+        self.player_pos = np.zeros((n, 3))
+        self.player_vel = np.zeros((n, 3))
+        self.time_count = np.zeros(n, dtype=np.int64)
+        self.game_over = np.zeros(n, dtype=bool)
+        self.falling = np.zeros(n, dtype=bool)
+        self.powerup_active = np.zeros(n, dtype=bool)
+        self.powerup_timer = np.zeros(n, dtype=np.int64)
+        self.levels = np.zeros(n, dtype=np.int64)
+        self.crumble_timer = np.zeros(n, dtype=np.int64)
+        # Every game's tiles; each map_data.cells is a view of its row
+        self.grids = [None] * n
+        self.tiles = None
+        self.grid_x0 = np.zeros(n)
+        self.grid_y0 = np.zeros(n)
+        self.grid_size = np.zeros(n, dtype=np.int64)
+
+        self.states = []
+        for slot, seed in enumerate(seeds):
+            state = BatchedState(self, slot, seed=seed, level=level, verbose=False,
+                                 grid_length=grid_length, tick_rate=tick_rate, endless=endless)
+            init_map(state)
+            self.states.append(state)
+        self.dt = self.states[0].dt if self.states else 1.0
+        self.crumble_ticks = self.states[0].crumble_ticks if self.states else 0
+        self.edge = np.inf if endless else grid_length - ball_radius
+        self.ticks = 0
+        self._pack()
+
+    def bind_grid(self, slot, grid):
+        """Move ``grid``'s tiles into row ``slot`` and make ``grid.cells`` a view of it."""
+        cells = len(grid.cells)
+        if self.tiles is None or self.tiles.shape[1] < cells:
+            # First grid, or a bigger one (the endless window replacing the initial arena)
+            self.tiles = np.zeros((len(self.grids), cells), dtype=np.uint8)
+            for other, bound in enumerate(self.grids):
+                if bound is not None and other != slot:
+                    self.bind_grid(other, bound)
+        row = self.tiles[slot, :cells]
+        row[:] = np.frombuffer(grid.cells, dtype=np.uint8)
+        grid.cells = memoryview(row)
+        self.grids[slot] = grid
+        self.grid_x0[slot] = grid.x0
+        self.grid_y0[slot] = grid.y0
+        self.grid_size[slot] = grid.size
+
+    def _pack(self):
+        # Gather every instance's movers into one batch and hand views back
+        parts = [state.moving_objects for state in self.states]
+        sizes = np.array([len(part) for part in parts], dtype=np.intp)
+        self.movers = MovingObjects.concatenate(parts)
+        self.owner = np.repeat(np.arange(len(parts)), sizes) # batch row -> instance
+        offsets = np.zeros(len(parts) + 1, dtype=np.intp)
+        offsets[1:] = np.cumsum(sizes)
+        self.views = []
+        for state, start, stop in zip(self.states, offsets[:-1].tolist(), offsets[1:].tolist()):
+            state.moving_objects = self.movers.rows(start, stop)
+            self.views.append(state.moving_objects)
+
+    def _repack_if_needed(self):
+        # init_map() (portal, restart) or an endless-world recentre swapped a population
+        for state, view in zip(self.states, self.views):
+            if state.moving_objects is not view:
+                self._pack()
+                return
+
+    def step(self, inputs):
+        """Advance every game one tick; ``inputs`` holds one key tuple per game."""
+        states = self.states
+        if self.auto_restart:
+            for i in np.flatnonzero(self.game_over).tolist():
+                restart(states[i], self.level)
+        for state, keys in zip(states, inputs):
+            for key in keys:
+                apply_input(state, key)
+        active = ~self.game_over
+        self._repack_if_needed()
+
+        # Same order as sim.update(): the ball, movers after the ball, then the crumble
+        self._update_players(active)
+        if self.endless:
+            for i in np.flatnonzero(active).tolist():
+                states[i].world.follow(states[i])
+        self._repack_if_needed()
+        if len(self.movers):
+            self.movers.advance(self.dt, active[self.owner])
+        self._update_meltdown(active)
+        self.ticks += 1
+
+    def _update_players(self, active):
+        # sim.update_player() for every active game at once. Games whose ball
+        # could touch anything but floor this tick finish in sim.check_collisions()
+        states, dt = self.states, self.dt
+        pos, vel = self.player_pos, self.player_vel
+        self.time_count[active] += 1
+
+        falling = np.flatnonzero(active & self.falling)
+        rolling = np.flatnonzero(active & ~self.falling) # Before respawns clear falling
+        if len(falling):
+            pos[falling, 2] -= gravity * 4 * dt
+            vel[falling, :2] *= 0.99 ** dt
+            for i in falling[pos[falling, 2] < -700].tolist():
+                fell_out(states[i])
+
+        if not len(rolling):
+            return
+        boosted = rolling[self.powerup_active[rolling]]
+        ticking = boosted[self.powerup_timer[boosted] > 0]
+        for i in boosted[self.powerup_timer[boosted] <= 0].tolist():
+            end_powerup(states[i])
+        self.powerup_timer[ticking] -= 1
+        slow = np.zeros(len(pos), dtype=bool)
+        slow[ticking] = True
+        current_friction = np.where(slow[rolling], 0.985 ** dt, friction ** dt)
+        vel[rolling, :2] *= current_friction[:, np.newaxis]
+
+        start = pos[rolling, :2].copy()
+        pos[rolling, :2] += vel[rolling, :2] * dt
+        # Arena walls: clamp and bounce (check_collisions() does the same per game)
+        edge = self.edge
+        for axis in (0, 1):
+            p = pos[rolling, axis]
+            over, under = p > edge, p < -edge
+            pos[rolling[over], axis] = edge
+            pos[rolling[under], axis] = -edge
+            vel[rolling[over | under], axis] *= -0.8
+
+        quiet = self._only_floor(rolling, start)
+        for i, (sx, sy) in zip(rolling[~quiet].tolist(), start[~quiet].tolist()):
+            check_collisions(states[i], (sx, sy))
+        # A quiet tick leaves only the moving objects to check
+        for i in self._on_movers(rolling[quiet]).tolist():
+            collide_movers(states[i])
+
+    def _update_meltdown(self, active):
+        # sim.update_meltdown() for every active game at once
+        melting = active & (self.levels >= 5) & ~self.falling & ~self.game_over
+        self.crumble_timer[melting] += 1
+        due = np.flatnonzero(melting & (self.crumble_timer > self.crumble_ticks))
+        self.crumble_timer[due] = 0
+        for i in due.tolist():
+            crumble(self.states[i])
+
+    def _only_floor(self, rows, start):
+        # True where every cell the ball's swept circle can reach this tick is
+        # floor (or off the grid), i.e. check_collisions() would find nothing.
+        # Same bounding box as collide._candidate_cells(); wider sweeps are not quiet
+        cs = GRID_CELL_SIZE
+        size = self.grid_size[rows]
+        sx, sy = start[:, 0], start[:, 1]
+        ex, ey = self.player_pos[rows, 0], self.player_pos[rows, 1]
+        x0, y0 = self.grid_x0[rows], self.grid_y0[rows]
+        col0 = np.floor((np.minimum(sx, ex) - ball_radius - x0) / cs).astype(np.int64)
+        col1 = np.floor((np.maximum(sx, ex) + ball_radius - x0) / cs).astype(np.int64)
+        row0 = np.floor((np.minimum(sy, ey) - ball_radius - y0) / cs).astype(np.int64)
+        row1 = np.floor((np.maximum(sy, ey) + ball_radius - y0) / cs).astype(np.int64)
+        quiet = (col1 - col0 < 3) & (row1 - row0 < 3)
+        for dc in range(3):
+            for dr in range(3):
+                col, row = col0 + dc, row0 + dr
+                inside = ((col <= col1) & (row <= row1) &
+                          (col >= 0) & (col < size) & (row >= 0) & (row < size))
+                cell = np.where(inside, row * size + col, 0)
+                quiet &= ~inside | (self.tiles[rows, cell] == FLOOR)
+        return quiet
+
+    def _on_movers(self, rows):
+        # Games among ``rows`` whose ball centre is inside one of their moving objects
+        if not len(rows) or not len(self.movers):
+            return rows[:0]
+        ball = self.player_pos[self.owner]
+        corner = self.movers.pos
+        bx, by = ball[:, 0], ball[:, 1]
+        cx, cy = corner[:, 0], corner[:, 1]
+        inside = (bx > cx) & (bx < cx + GRID_CELL_SIZE) & (by > cy) & (by < cy + GRID_CELL_SIZE)
+        hit = np.zeros(len(self.states), dtype=bool)
+        hit[self.owner[inside]] = True
+        return rows[hit[rows]]
+
+
+def run_shard(seeds, ticks, level=1, policy=RandomWalkPolicy, grid_length=GRID_LENGTH,
+              tick_rate=BASE_TICK_RATE, endless=False):
+    """Run one BatchSim for ``ticks`` ticks; returns per-game results and timing."""
+    sim = BatchSim(seeds, level, grid_length, tick_rate, endless)
+    bot = policy()
+    bot.reset(sim.states)
+    start = time.perf_counter()
+    for tick in range(ticks):
+        sim.step(bot.act(sim.states, tick))
+    elapsed = time.perf_counter() - start
+    return {
+        'instances': len(sim.states),
+        'ticks': ticks,
+        'elapsed': elapsed,
+        'scores': [state.score for state in sim.states],
+        'levels': [state.level for state in sim.states],
+    }
+
+
+def run_parallel(instances, ticks, jobs=None, first_seed=0, **kwargs):
+    """Spread ``instances`` games over ``jobs`` processes; returns (shard results, wall seconds)."""
+    jobs = max(1, min(jobs or os.cpu_count() or 1, instances))
+    shards = [seeds.tolist() for seeds in
+              np.array_split(np.arange(first_seed, first_seed + instances), jobs)]
+    start = time.perf_counter()
+    if jobs == 1:
+        results = [run_shard(shards[0], ticks, **kwargs)]
+    else:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            futures = [pool.submit(run_shard, shard, ticks, **kwargs) for shard in shards]
+            results = [future.result() for future in futures]
+    return results, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run many headless games in parallel")
+    parser.add_argument("--instances", type=int, default=256)
+    parser.add_argument("--ticks", type=int, default=2000)
+    parser.add_argument("--jobs", type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument("--level", type=int, default=1)
+    parser.add_argument("--policy", choices=sorted(POLICIES), default='random')
+    parser.add_argument("--first-seed", type=int, default=0)
+    parser.add_argument("--grid-length", type=int, default=GRID_LENGTH)
+    parser.add_argument("--tick-rate", type=int, default=BASE_TICK_RATE)
+    parser.add_argument("--endless", action="store_true")
+    args = parser.parse_args()
+
+    results, wall = run_parallel(args.instances, args.ticks, args.jobs, args.first_seed,
+                                 level=args.level, policy=POLICIES[args.policy],
+                                 grid_length=args.grid_length, tick_rate=args.tick_rate,
+                                 endless=args.endless)
+    instance_ticks = sum(r['instances'] * r['ticks'] for r in results)
+    scores = [score for r in results for score in r['scores']]
+    levels = [level for r in results for level in r['levels']]
+    print(f"{args.instances} games x {args.ticks} ticks on {len(results)} process(es): "
+          f"{wall:.2f}s wall, {instance_ticks / wall:.0f} instance-ticks/sec")
+    print(f"score mean {np.mean(scores):.1f} max {max(scores)} | "
+          f"highest level {max(levels)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,325 @@
+"""Offscreen rendering for screenshots, level thumbnails and video clips.
+
+``OffscreenRenderer`` draws the same scene as the game window
+(``render.draw_scene()``: floor, obstacles, items, moving objects and the
+ball, without the HUD text) into a framebuffer object of a headless EGL
+context, so no window or display server is needed. Each frame is read back
+with ``glReadPixels`` straight into a preallocated buffer.
+
+``FrameWriter`` owns a small pool of those buffers and a background thread
+that writes filled ones to a sink (PNG/PPM image files or an ffmpeg pipe)
+and puts them back in the pool. Rendering only waits when the writer has
+fallen a whole pool behind.
+
+    python -m hazard.capture thumbnails --levels 1-5 --seeds 10 --out thumbs/
+    python -m hazard.capture clip --seed 7 --level 3 --ticks 600 --out clip.mp4
+"""
+import argparse
+import ctypes
+import os
+import queue
+import shutil
+import struct
+import subprocess
+import threading
+import time
+import zlib
+
+# Before the first PyOpenGL import anywhere (hazard.render below): EGL needs no X display
+os.environ.setdefault('PYOPENGL_PLATFORM', 'egl')
+
+import numpy as np
+from OpenGL import EGL
+from OpenGL.GL import *
+
+from hazard import render
+from hazard.analysis import parse_levels
+from hazard.batch import POLICIES
+from hazard.replay import Recording, Replayer
+from hazard.sim import GRID_LENGTH, GameState, init_map, restart, step
+
+EGL_PLATFORM_SURFACELESS_MESA = 0x31DD
+THUMB_WIDTH, THUMB_HEIGHT = 400, 360
+PNG_LEVEL = 1 # zlib level: the writer thread has to keep up with rendering
+VIDEO_SUFFIXES = ('.mp4', '.mkv', '.mov', '.webm', '.avi')
+
+
+def create_context():
+    """Make a surfaceless EGL OpenGL context current; returns ``(display, context)``."""
+    display = EGL.EGL_NO_DISPLAY
+    if bool(EGL.eglGetPlatformDisplayEXT):
+        display = EGL.eglGetPlatformDisplayEXT(EGL_PLATFORM_SURFACELESS_MESA,
+                                               EGL.EGL_DEFAULT_DISPLAY, None)
+    if not display:
+        display = EGL.eglGetDisplay(EGL.EGL_DEFAULT_DISPLAY)
+    if not display or not EGL.eglInitialize(display, None, None):
+        raise RuntimeError("no EGL display available for offscreen rendering")
+    attrs = (EGL.EGLint * 5)(EGL.EGL_SURFACE_TYPE, EGL.EGL_PBUFFER_BIT,
+                             EGL.EGL_RENDERABLE_TYPE, EGL.EGL_OPENGL_BIT, EGL.EGL_NONE)
+    config, n_configs = EGL.EGLConfig(), EGL.EGLint()
+    EGL.eglChooseConfig(display, attrs, ctypes.pointer(config), 1, ctypes.pointer(n_configs))
+    if not n_configs.value:
+        raise RuntimeError("no EGL config with desktop OpenGL support")
+    EGL.eglBindAPI(EGL.EGL_OPENGL_API)
+    context = EGL.eglCreateContext(display, config, EGL.EGL_NO_CONTEXT, None)
+    # Surfaceless: everything is drawn into our own framebuffer object
+    if not context or not EGL.eglMakeCurrent(display, EGL.EGL_NO_SURFACE, EGL.EGL_NO_SURFACE, context):
+        raise RuntimeError("could not create an EGL OpenGL context")
+    return display, context
+
+
+class OffscreenRenderer:
+    """Draws game states into a ``width`` x ``height`` framebuffer object."""
+
+    def __init__(self, width=render.W_WIDTH, height=render.W_HEIGHT):
+        self.width, self.height = width, height
+        self.display, self.context = create_context()
+        self.fbo = glGenFramebuffers(1)
+        glBindFramebuffer(GL_FRAMEBUFFER, self.fbo)
+        color, depth = glGenRenderbuffers(2)
+        for buffer, fmt, attachment in ((color, GL_RGBA8, GL_COLOR_ATTACHMENT0),
+                                        (depth, GL_DEPTH_COMPONENT24, GL_DEPTH_ATTACHMENT)):
+            glBindRenderbuffer(GL_RENDERBUFFER, buffer)
+            glRenderbufferStorage(GL_RENDERBUFFER, fmt, width, height)
+            glFramebufferRenderbuffer(GL_FRAMEBUFFER, attachment, GL_RENDERBUFFER, buffer)
+        if glCheckFramebufferStatus(GL_FRAMEBUFFER) != GL_FRAMEBUFFER_COMPLETE:
+            raise RuntimeError("offscreen framebuffer is incomplete")
+        glViewport(0, 0, width, height)
+        glPixelStorei(GL_PACK_ALIGNMENT, 1) # Tightly packed RGB rows
+        glEnable(GL_DEPTH_TEST)
+        render.W_WIDTH, render.W_HEIGHT = width, height # Camera aspect ratio
+        render.init_meshes()
+
+    @property
+    def shape(self):
+        """Shape of one frame buffer: (height, width, 3) uint8, bottom row first."""
+        return (self.height, self.width, 3)
+
+    def draw(self, state):
+        if render.state is not state:
+            render.attach(state)
+        render.draw_scene()
+
+    def read(self, out):
+        """Copy the last drawn frame into ``out`` (an array of ``shape``)."""
+        glReadPixels(0, 0, self.width, self.height, GL_RGB, GL_UNSIGNED_BYTE, out)
+        return out
+
+    def capture(self, state, out):
+        self.draw(state)
+        return self.read(out)
+
+    def finish(self):
+        """Wait until everything drawn so far is done (read() does this implicitly)."""
+        glFinish()
+
+
+def png_bytes(frame):
+    # frame is bottom row first, as read back; PNG rows go top down, each after a filter byte
+    height, width, _ = frame.shape
+    rows = np.zeros((height, width * 3 + 1), dtype=np.uint8)
+    rows[:, 1:] = frame[::-1].reshape(height, -1)
+    def chunk(tag, data):
+        return (struct.pack('>I', len(data)) + tag + data +
+                struct.pack('>I', zlib.crc32(tag + data) & 0xffffffff))
+    header = struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0) # 8-bit RGB
+    return (b'\x89PNG\r\n\x1a\n' + chunk(b'IHDR', header) +
+            chunk(b'IDAT', zlib.compress(rows, PNG_LEVEL)) + chunk(b'IEND', b''))
+
+
+class ImageSequence:
+    """Writes each frame to ``pattern % key`` as .png or .ppm (by the pattern's suffix)."""
+
+    def __init__(self, pattern):
+        self.pattern = pattern
+        self.ppm = pattern.lower().endswith('.ppm')
+        directory = os.path.dirname(pattern)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def write(self, key, frame):
+        with open(self.pattern % key, 'wb') as f:
+            if self.ppm:
+                height, width, _ = frame.shape
+                f.write(b'P6 %d %d 255\n' % (width, height))
+                f.write(frame[::-1].tobytes())
+            else:
+                f.write(png_bytes(frame))
+
+    def close(self):
+        pass
+
+
+class FFmpegPipe:
+    """Streams raw frames into an ffmpeg process encoding ``path``."""
+
+    def __init__(self, path, width, height, fps=60):
+        ffmpeg = shutil.which('ffmpeg')
+        if ffmpeg is None:
+            raise RuntimeError("ffmpeg not found on PATH; write an image sequence instead")
+        self.process = subprocess.Popen(
+            [ffmpeg, '-y', '-loglevel', 'error', '-f', 'rawvideo', '-pix_fmt', 'rgb24',
+             '-s', f'{width}x{height}', '-r', str(fps), '-i', '-',
+             '-vf', 'vflip', '-pix_fmt', 'yuv420p', path], stdin=subprocess.PIPE)
+
+    def write(self, key, frame):
+        self.process.stdin.write(frame.data)
+
+    def close(self):
+        self.process.stdin.close()
+        if self.process.wait():
+            raise RuntimeError(f"ffmpeg exited with status {self.process.returncode}")
+
+
+class FrameWriter:
+    """Writes frames on a background thread, recycling a fixed pool of buffers.
+
+    ``acquire()`` a buffer, fill it, ``submit()`` it; the thread writes it
+    to ``sink`` and returns it to the pool. ``waits`` counts the acquires
+    that had to wait for the writer.
+    """
+
+    def __init__(self, sink, shape, buffers=4):
+        self.sink = sink
+        self.free = queue.Queue()
+        for _ in range(buffers):
+            self.free.put(np.empty(shape, dtype=np.uint8))
+        self.pending = queue.Queue()
+        self.frames = 0
+        self.waits = 0
+        self.error = None
+        self.thread = threading.Thread(target=self._run, name="frame-writer", daemon=True)
+        self.thread.start()
+
+    def acquire(self):
+        try:
+            return self.free.get_nowait()
+        except queue.Empty:
+            self.waits += 1
+            return self.free.get()
+
+    def submit(self, frame, key=None):
+        """Queue ``frame`` for writing under ``key`` (default: the frame number)."""
+        if self.error is not None:
+            raise self.error
+        self.pending.put((self.frames if key is None else key, frame))
+        self.frames += 1
+
+    def _run(self):
+        while True:
+            item = self.pending.get()
+            if item is None:
+                return
+            key, frame = item
+            if self.error is None:
+                try:
+                    self.sink.write(key, frame)
+                except Exception as e: # Re-raised on the rendering thread
+                    self.error = e
+            self.free.put(frame)
+
+    def close(self):
+        """Wait for the queued frames to be written and close the sink."""
+        self.pending.put(None)
+        self.thread.join()
+        self.sink.close()
+        if self.error is not None:
+            raise self.error
+
+
+def overview_camera(state):
+    # High third-person view that fits the arena around the ball
+    render.is_first_person = False
+    render.camera_angle_h = 0.0
+    render.camera_angle_v = 1.8
+    render.camera_zoom = min(state.grid_length * 1.25, render.FAR_PLANE / 2)
+
+
+def capture_thumbnails(renderer, writer, levels, seeds, first_seed=0, grid_length=GRID_LENGTH):
+    """One overview frame of the first map per (level, seed), keyed ``(level, seed)``."""
+    for level in levels:
+        for seed in range(first_seed, first_seed + seeds):
+            state = GameState(seed=seed, level=level, verbose=False, grid_length=grid_length)
+            init_map(state)
+            overview_camera(state)
+            writer.submit(renderer.capture(state, writer.acquire()), (level, seed))
+
+
+def capture_clip(renderer, writer, state, ticks, advance, every=1):
+    """Step ``state`` with ``advance(state, tick)`` and capture every ``every``-th tick."""
+    for tick in range(ticks):
+        advance(state, tick)
+        if tick % every == 0:
+            writer.submit(renderer.capture(state, writer.acquire()))
+
+
+def policy_driver(policy, state):
+    policy.reset([state])
+    def advance(state, tick):
+        if state.game_over:
+            restart(state, state.level)
+        step(state, policy.act([state], tick)[0])
+    return advance
+
+
+def open_sink(out, pattern, width, height, fps):
+    # A video file name pipes to ffmpeg, anything else is a directory of images
+    if out.lower().endswith(VIDEO_SUFFIXES):
+        return FFmpegPipe(out, width, height, fps)
+    return ImageSequence(os.path.join(out, pattern))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Render level thumbnails or gameplay clips offscreen")
+    parser.add_argument("mode", choices=("thumbnails", "clip"))
+    parser.add_argument("--out", required=True,
+                        help="output directory (images) or, for clips, a video file such as clip.mp4")
+    parser.add_argument("--format", choices=("png", "ppm"), default="png", help="image file format")
+    parser.add_argument("--width", type=int, default=None)
+    parser.add_argument("--height", type=int, default=None)
+    parser.add_argument("--buffers", type=int, default=4, help="frame buffers shared with the writer thread")
+    parser.add_argument("--grid-length", type=int, default=GRID_LENGTH)
+    parser.add_argument("--levels", type=parse_levels, default=[1, 2, 3, 4, 5],
+                        help="thumbnails: levels as 1-5 or 1,3,5")
+    parser.add_argument("--seeds", type=int, default=10, help="thumbnails: seeds per level")
+    parser.add_argument("--first-seed", type=int, default=0)
+    parser.add_argument("--seed", type=int, default=None, help="clip: game seed")
+    parser.add_argument("--level", type=int, default=1, help="clip: starting level")
+    parser.add_argument("--ticks", type=int, default=600, help="clip: ticks to play")
+    parser.add_argument("--policy", choices=sorted(POLICIES), default='seek', help="clip: bot driving the ball")
+    parser.add_argument("--replay", metavar="PATH", help="clip: play back a recording instead of a bot")
+    parser.add_argument("--every", type=int, default=1, help="clip: capture every N-th tick")
+    parser.add_argument("--fps", type=int, default=60, help="clip: video frame rate")
+    parser.add_argument("--guide", action="store_true", help="draw the route guide (the 'G' overlay)")
+    args = parser.parse_args()
+
+    thumbnails = args.mode == "thumbnails"
+    width = args.width or (THUMB_WIDTH if thumbnails else render.W_WIDTH)
+    height = args.height or (THUMB_HEIGHT if thumbnails else render.W_HEIGHT)
+    renderer = OffscreenRenderer(width, height)
+    render.show_guide = args.guide
+    pattern = f"level%d_seed%06d.{args.format}" if thumbnails else f"frame_%06d.{args.format}"
+    writer = FrameWriter(open_sink(args.out, pattern, width, height, args.fps), renderer.shape,
+                         args.buffers)
+
+    start = time.perf_counter()
+    if thumbnails:
+        capture_thumbnails(renderer, writer, args.levels, args.seeds, args.first_seed, args.grid_length)
+    elif args.replay:
+        recording = Recording.load(args.replay)
+        replayer = Replayer(recording)
+        capture_clip(renderer, writer, recording.new_state(), recording.ticks,
+                     lambda state, tick: replayer.step(state), args.every)
+    else:
+        state = GameState(seed=args.seed, level=args.level, verbose=False, grid_length=args.grid_length)
+        init_map(state)
+        capture_clip(renderer, writer, state, args.ticks,
+                     policy_driver(POLICIES[args.policy](), state), args.every)
+    writer.close()
+    elapsed = time.perf_counter() - start
+    print(f"{writer.frames} frames ({width}x{height}) in {elapsed:.2f}s "
+          f"({writer.frames / elapsed:.1f} frames/sec, writer waits: {writer.waits}) -> {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+"""Swept ball-vs-grid collision helpers.
+
+A tick moves the ball centre along a segment. ``traverse()`` lists the grid
+cells that segment crosses, in order (Amanatides-Woo DDA), so a fast ball
+can no longer skip a hole or an item. ``first_obstacle_hit()`` finds the
+earliest moment the ball's circle (not just its centre) touches an
+obstacle cell, checking only cells the swept circle can reach (the radius
+is smaller than a cell, so crossed cells and their neighbours at most).
+"""
+import math
+
+from hazard.grid import OBSTACLE
+
+
+def traverse(grid, sx, sy, dx, dy, t_max=1.0):
+    """(cell index, t_enter, t_exit) of every cell the segment s + t*d, 0 <= t <= t_max, crosses.
+
+    Cells outside the grid are reported with index -1.
+    """
+    cs = grid.cell_size
+    fx = (sx - grid.x0) / cs
+    fy = (sy - grid.y0) / cs
+    col = math.floor(fx)
+    row = math.floor(fy)
+    step_col = 1 if dx > 0 else -1
+    step_row = 1 if dy > 0 else -1
+    # t at the next column/row boundary and per whole cell
+    if dx:
+        t_col = ((col + (dx > 0)) - fx) * cs / dx
+        dt_col = cs / abs(dx)
+    else:
+        t_col = dt_col = math.inf
+    if dy:
+        t_row = ((row + (dy > 0)) - fy) * cs / dy
+        dt_row = cs / abs(dy)
+    else:
+        t_row = dt_row = math.inf
+
+    size = grid.size
+    cells = []
+    t = 0.0
+    while True:
+        t_exit = min(t_col, t_row)
+        inside = 0 <= col < size and 0 <= row < size
+        cells.append((row * size + col if inside else -1, t, min(t_exit, t_max)))
+        if t_exit >= t_max:
+            return cells
+        t = t_exit
+        if t_col < t_row:
+            col += step_col
+            t_col += dt_col
+        else:
+            row += step_row
+            t_row += dt_row
+
+
+def _slab(sx, sy, dx, dy, x0, y0, x1, y1):
+    # Entry t of the segment into the box, or None if it misses or starts inside
+    t_enter, t_exit = -math.inf, math.inf
+    for s, d, lo, hi in ((sx, dx, x0, x1), (sy, dy, y0, y1)):
+        if d == 0:
+            if not lo <= s <= hi:
+                return None
+            continue
+        ta, tb = (lo - s) / d, (hi - s) / d
+        if ta > tb:
+            ta, tb = tb, ta
+        t_enter = max(t_enter, ta)
+        t_exit = min(t_exit, tb)
+    if t_enter > t_exit or t_enter < 0 or t_enter > 1:
+        return None
+    return t_enter
+
+
+def _circle(sx, sy, dx, dy, cx, cy, radius):
+    # First t at which the point s + t*d is ``radius`` away from c
+    ox, oy = sx - cx, sy - cy
+    a = dx * dx + dy * dy
+    c = ox * ox + oy * oy - radius * radius
+    if a == 0 or c < 0:
+        return None
+    b = ox * dx + oy * dy
+    disc = b * b - a * c
+    if disc < 0:
+        return None
+    t = (-b - math.sqrt(disc)) / a
+    return t if 0 <= t <= 1 else None
+
+
+def sweep_circle_box(sx, sy, dx, dy, radius, x0, y0, x1, y1):
+    """Earliest t in [0, 1] at which a circle moving from s by d touches the box, or None.
+
+    Exact test against the box grown by ``radius`` with rounded corners.
+    Circles already overlapping the box at t = 0 are ignored.
+    """
+    hits = [_slab(sx, sy, dx, dy, x0 - radius, y0, x1 + radius, y1),
+            _slab(sx, sy, dx, dy, x0, y0 - radius, x1, y1 + radius)]
+    for cx in (x0, x1):
+        for cy in (y0, y1):
+            hits.append(_circle(sx, sy, dx, dy, cx, cy, radius))
+    hits = [t for t in hits if t is not None]
+    return min(hits) if hits else None
+
+
+def _candidate_cells(grid, sx, sy, dx, dy, radius, path):
+    # Cells the swept circle can touch: its bounding box when that is small
+    # (the usual slow tick), otherwise the crossed cells plus neighbours
+    cs = grid.cell_size
+    col0 = math.floor((min(sx, sx + dx) - radius - grid.x0) / cs)
+    col1 = math.floor((max(sx, sx + dx) + radius - grid.x0) / cs)
+    row0 = math.floor((min(sy, sy + dy) - radius - grid.y0) / cs)
+    row1 = math.floor((max(sy, sy + dy) + radius - grid.y0) / cs)
+    if (col1 - col0 + 1) * (row1 - row0 + 1) <= 9:
+        spans = [(row0, row1, col0, col1)]
+    else:
+        spans = []
+        for cell, _, _ in path:
+            if cell >= 0:
+                row, col = divmod(cell, grid.size)
+                spans.append((row - 1, row + 1, col - 1, col + 1))
+    size = grid.size
+    seen = set()
+    for r0, r1, c0, c1 in spans:
+        for r in range(max(r0, 0), min(r1, size - 1) + 1):
+            for c in range(max(c0, 0), min(c1, size - 1) + 1):
+                i = r * size + c
+                if i not in seen:
+                    seen.add(i)
+                    yield i
+
+
+def first_obstacle_hit(grid, sx, sy, dx, dy, radius, path):
+    """Earliest t in [0, 1] at which the ball touches an obstacle cell, or None.
+
+    ``path`` is traverse() output for the same segment.
+    """
+    if not grid.by_type[OBSTACLE] or (dx == 0 and dy == 0):
+        return None
+    cells = grid.cells
+    best = None
+    for i in _candidate_cells(grid, sx, sy, dx, dy, radius, path):
+        if cells[i] != OBSTACLE:
+            continue
+        x0, y0 = grid.key(i)
+        t = sweep_circle_box(sx, sy, dx, dy, radius, x0, y0,
+                             x0 + grid.cell_size, y0 + grid.cell_size)
+        if t is not None and (best is None or t < best):
+            best = t
+    return best
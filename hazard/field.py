@@ -0,0 +1,297 @@
+"""Per-map hazard queries: distance to danger, connectivity and safe floor.
+
+``HazardField`` is built once per map (lazily, see ``sim.hazard_field()``)
+and then kept up to date tile by tile as floor crumbles and items are
+picked up:
+
+* ``dist``: 4-connected (L1) distance in cells from every cell to the
+  nearest hole. Holes only ever appear, so a new hole just lowers the
+  distances around it with a small wavefront.
+* ``labels``: connected components of the walkable cells (anything but
+  holes and obstacles); a label is the flat index of the component's
+  first cell, -1 elsewhere. A lost cell costs a search around it; only
+  the pieces of a component that actually splits (or loses its first
+  cell) are relabelled.
+* ``safe``: the floor cells, bucketed into SAFE_BLOCK x SAFE_BLOCK blocks
+  so a random floor cell near a point is drawn in constant time.
+"""
+from collections import deque
+
+import numpy as np
+
+from hazard.grid import FLOOR, HOLE, OBSTACLE
+
+FAR = 1 << 30 # Distance on a map without holes
+SAFE_BLOCK = 3
+
+
+def label_components(walkable):
+    """Component labels of a 2-D bool mask: min flat index of each component, -1 off the mask.
+
+    Min-label propagation with array shifts plus pointer jumping, so it
+    takes a few dozen whole-array steps rather than one per cell.
+    """
+    n = walkable.size
+    lab = np.where(walkable, np.arange(n).reshape(walkable.shape), n)
+    while True:
+        new = lab.copy()
+        np.minimum(new[1:, :], lab[:-1, :], out=new[1:, :])
+        np.minimum(new[:-1, :], lab[1:, :], out=new[:-1, :])
+        np.minimum(new[:, 1:], lab[:, :-1], out=new[:, 1:])
+        np.minimum(new[:, :-1], lab[:, 1:], out=new[:, :-1])
+        new[~walkable] = n
+        flat = new.reshape(-1)
+        on = flat < n
+        flat[on] = flat[flat[on]] # Jump to the label's own label
+        if np.array_equal(new, lab):
+            break
+        lab = new
+    lab[~walkable] = -1
+    return lab
+
+
+def _neighbours(i, size):
+    """Flat indexes of the 4-neighbours of cell ``i`` on a size x size grid."""
+    row, col = divmod(i, size)
+    if row > 0:
+        yield i - size
+    if row < size - 1:
+        yield i + size
+    if col > 0:
+        yield i - 1
+    if col < size - 1:
+        yield i + 1
+
+
+def hole_distances(holes):
+    """L1 distance in cells from every cell to the nearest True cell of ``holes`` (FAR if none)."""
+    size_y, size_x = holes.shape
+    dist = np.where(holes, 0, FAR).astype(np.int64)
+    # Separable: nearest hole along each row, then combine rows
+    for x in range(1, size_x):
+        np.minimum(dist[:, x], dist[:, x - 1] + 1, out=dist[:, x])
+    for x in range(size_x - 2, -1, -1):
+        np.minimum(dist[:, x], dist[:, x + 1] + 1, out=dist[:, x])
+    for y in range(1, size_y):
+        np.minimum(dist[y], dist[y - 1] + 1, out=dist[y])
+    for y in range(size_y - 2, -1, -1):
+        np.minimum(dist[y], dist[y + 1] + 1, out=dist[y])
+    return np.minimum(dist, FAR).astype(np.int32)
+
+
+class SafeCellIndex:
+    """Set of cell indices bucketed by block, with O(1) add, discard and nearby sampling."""
+
+    def __init__(self, size, cells, block=SAFE_BLOCK):
+        self.size = size
+        self.block = block
+        self.blocks_per_row = -(-size // block)
+        cells = np.asarray(cells, dtype=np.int64)
+        rows, cols = np.divmod(cells, size)
+        owner = (rows // block) * self.blocks_per_row + cols // block
+        order = np.argsort(owner, kind='stable')
+        cells, owner = cells[order], owner[order]
+        n_blocks = self.blocks_per_row ** 2
+        self.count = np.bincount(owner, minlength=n_blocks).astype(np.int32)
+        starts = np.zeros(n_blocks, dtype=np.int64)
+        starts[1:] = np.cumsum(self.count)[:-1]
+        rank = np.arange(len(cells)) - starts[owner]
+        self.members = np.zeros((n_blocks, block * block), dtype=np.int32)
+        self.members[owner, rank] = cells
+        self.slot = np.full(size * size, -1, dtype=np.int32) # Position in its block, -1 if absent
+        self.slot[cells] = rank
+
+    def __len__(self):
+        return int(self.count.sum())
+
+    def __contains__(self, i):
+        return self.slot[i] >= 0
+
+    def _block(self, i):
+        row, col = divmod(i, self.size)
+        return (row // self.block) * self.blocks_per_row + col // self.block
+
+    def add(self, i):
+        if self.slot[i] >= 0:
+            return
+        b = self._block(i)
+        k = self.count[b]
+        self.members[b, k] = i
+        self.slot[i] = k
+        self.count[b] = k + 1
+
+    def discard(self, i):
+        k = self.slot[i]
+        if k < 0:
+            return
+        b = self._block(i)
+        last = self.count[b] - 1
+        moved = self.members[b, last] # Swap-remove
+        self.members[b, k] = moved
+        self.slot[moved] = k
+        self.slot[i] = -1
+        self.count[b] = last
+
+    def sample_near(self, row, col, rng, radius=1):
+        """Uniform random member in the blocks within ``radius`` blocks of cell (row, col), or -1."""
+        n = self.blocks_per_row
+        br, bc = row // self.block, col // self.block
+        blocks = [r * n + c
+                  for r in range(max(br - radius, 0), min(br + radius, n - 1) + 1)
+                  for c in range(max(bc - radius, 0), min(bc + radius, n - 1) + 1)]
+        counts = self.count[blocks].tolist()
+        total = sum(counts)
+        if not total:
+            return -1
+        pick = rng.randrange(total)
+        for b, k in zip(blocks, counts):
+            if pick < k:
+                return int(self.members[b, pick])
+            pick -= k
+
+
+class HazardField:
+    def __init__(self, grid):
+        self.grid = grid # The TileGrid this field describes
+        tiles = grid.array
+        self.dist = hole_distances(tiles == HOLE)
+        self.labels = label_components((tiles != HOLE) & (tiles != OBSTACLE))
+        self.safe = SafeCellIndex(grid.size, np.flatnonzero(tiles.reshape(-1) == FLOOR))
+
+    def cell(self, x, y):
+        """(row, col) of the cell holding world point (x, y); may lie outside the grid."""
+        grid = self.grid
+        return (int((y - grid.y0) // grid.cell_size), int((x - grid.x0) // grid.cell_size))
+
+    def distance_at(self, x, y):
+        """Cells (L1) from (x, y) to the nearest hole; None off the grid or without holes."""
+        i = self.grid.index(x, y)
+        if i < 0:
+            return None
+        d = int(self.dist.reshape(-1)[i])
+        return None if d == FAR else d
+
+    def component_at(self, x, y):
+        """Label of the walkable region holding (x, y), or -1 (hole, obstacle, off the grid)."""
+        i = self.grid.index(x, y)
+        return int(self.labels.reshape(-1)[i]) if i >= 0 else -1
+
+    def connected(self, a, b):
+        """Whether world points ``a`` and ``b`` can be joined on walkable cells."""
+        la = self.component_at(*a)
+        return la >= 0 and la == self.component_at(*b)
+
+    def update(self, i):
+        """Catch up with a change of cell ``i`` already written to the grid."""
+        tile_type = self.grid.cells[i]
+        if tile_type == FLOOR:
+            self.safe.add(i)
+        else:
+            self.safe.discard(i)
+        if tile_type == HOLE and self.dist.reshape(-1)[i] != 0:
+            self._add_hole(i)
+        elif tile_type != HOLE and self.dist.reshape(-1)[i] == 0:
+            # Never happens in play (holes stay holes); recompute
+            self.dist = hole_distances(self.grid.array == HOLE)
+        walkable = tile_type not in (HOLE, OBSTACLE)
+        if not walkable and self.labels.reshape(-1)[i] >= 0:
+            self._remove_walkable(i)
+        elif walkable and self.labels.reshape(-1)[i] < 0:
+            self._add_walkable(i)
+
+    def _add_hole(self, i):
+        # Wavefront from the new hole through the cells it is now closest to
+        size = self.grid.size
+        dist = self.dist
+        row, col = divmod(i, size)
+        dist[row, col] = 0
+        queue = deque([(row, col)])
+        while queue:
+            r, c = queue.popleft()
+            d = dist[r, c] + 1
+            for nr, nc in ((r - 1, c), (r + 1, c), (r, c - 1), (r, c + 1)):
+                if 0 <= nr < size and 0 <= nc < size and dist[nr, nc] > d:
+                    dist[nr, nc] = d
+                    queue.append((nr, nc))
+
+    def _add_walkable(self, i):
+        # Merge the regions the new cell touches
+        size = self.grid.size
+        labels = self.labels
+        row, col = divmod(i, size)
+        joined = {int(labels[r, c]) for r, c in ((row - 1, col), (row + 1, col), (row, col - 1), (row, col + 1))
+                  if 0 <= r < size and 0 <= c < size and labels[r, c] >= 0}
+        label = min(joined | {i})
+        for old in joined - {label}:
+            labels[labels == old] = label
+        labels[row, col] = label
+
+    def _remove_walkable(self, i):
+        size = self.grid.size
+        flat = self.labels.reshape(-1)
+        old = int(flat[i])
+        flat[i] = -1
+        seeds = [j for j in _neighbours(i, size) if flat[j] == old]
+        kept = self._split_off(seeds, old) if len(seeds) > 1 else []
+        if old == i or kept:
+            # The rest of the region no longer holds the cell it is named after
+            rest = flat == old
+            rest[kept] = False
+            if rest.any():
+                flat[rest] = np.argmax(rest)
+
+    def _split_off(self, seeds, old):
+        """Give the pieces of region ``old`` cut off from each other their own labels.
+
+        One breadth-first search per seed (the removed cell's neighbours),
+        taking turns a cell at a time. Searches that meet are joined; one
+        that runs dry first has found a whole piece, which is relabelled,
+        so the work is bounded by the smaller pieces, or by how far the
+        seeds are apart when nothing split. The last piece keeps ``old``.
+        Returns the cells of a piece named ``old`` (it holds that cell),
+        for the caller to rename the rest.
+        """
+        size = self.grid.size
+        flat = self.labels.reshape(-1)
+        owner = dict(zip(seeds, range(len(seeds))))
+        parent = list(range(len(seeds)))
+        queues = [deque([j]) for j in seeds]
+        kept = []
+
+        def root(k):
+            while parent[k] != k:
+                k = parent[k]
+            return k
+
+        pieces = len(seeds)
+        while pieces > 1:
+            for k, queue in enumerate(queues):
+                if not queue:
+                    continue
+                cell = queue.popleft()
+                for j in _neighbours(cell, size):
+                    if flat[j] != old:
+                        continue
+                    other = owner.get(j)
+                    if other is None:
+                        owner[j] = k
+                        queue.append(j)
+                    elif root(other) != root(k):
+                        parent[root(other)] = root(k)
+                        pieces -= 1
+                if queue or pieces == 1:
+                    continue
+                group = {m for m in range(len(seeds)) if root(m) == root(k)}
+                if any(queues[m] for m in group):
+                    continue
+                # Every search of this piece ran dry: it is complete and cut off
+                cells = [j for j, m in owner.items() if m in group]
+                label = min(cells)
+                if label == old:
+                    kept = cells
+                else:
+                    flat[cells] = label
+                pieces -= 1
+                if pieces == 1:
+                    break
+        return kept
@@ -0,0 +1,65 @@
+"""Camera frustum maths for CPU-side culling.
+
+Builds the same matrices gluPerspective()/gluLookAt() would load, extracts
+the six clip planes and tests whole batches of boxes or spheres against
+them with NumPy. No OpenGL import, so the maths can be checked headless.
+"""
+import math
+
+import numpy as np
+
+
+def perspective(fovy_deg, aspect, near, far):
+    f = 1.0 / math.tan(math.radians(fovy_deg) / 2.0)
+    return np.array([
+        [f / aspect, 0.0, 0.0, 0.0],
+        [0.0, f, 0.0, 0.0],
+        [0.0, 0.0, (far + near) / (near - far), 2.0 * far * near / (near - far)],
+        [0.0, 0.0, -1.0, 0.0],
+    ])
+
+
+def look_at(eye, target, up):
+    eye = np.asarray(eye, dtype=np.float64)
+    forward = np.asarray(target, dtype=np.float64) - eye
+    forward /= np.linalg.norm(forward)
+    side = np.cross(forward, up)
+    side /= np.linalg.norm(side)
+    true_up = np.cross(side, forward)
+    view = np.identity(4)
+    view[0, :3], view[1, :3], view[2, :3] = side, true_up, -forward
+    view[:3, 3] = -view[:3, :3] @ eye
+    return view
+
+
+class Frustum:
+    """Six inward-facing planes (a, b, c, d) with a*x + b*y + c*z + d >= 0 inside."""
+
+    def __init__(self, clip_matrix):
+        m = clip_matrix
+        planes = np.array([m[3] + m[0], m[3] - m[0],  # left, right
+                           m[3] + m[1], m[3] - m[1],  # bottom, top
+                           m[3] + m[2], m[3] - m[2]]) # near, far
+        planes /= np.linalg.norm(planes[:, :3], axis=1)[:, np.newaxis]
+        self.planes = planes
+
+    @classmethod
+    def from_camera(cls, fovy_deg, aspect, near, far, eye, target, up=(0, 0, 1)):
+        return cls(perspective(fovy_deg, aspect, near, far) @ look_at(eye, target, up))
+
+    def boxes_visible(self, mins, maxs):
+        """Boolean mask of the (N, 3) axis-aligned boxes touching the frustum."""
+        mins = np.asarray(mins, dtype=np.float64)
+        maxs = np.asarray(maxs, dtype=np.float64)
+        visible = np.ones(len(mins), dtype=bool)
+        for normal, d in zip(self.planes[:, :3], self.planes[:, 3]):
+            # Corner of each box furthest along the plane normal
+            corner = np.where(normal >= 0, maxs, mins)
+            visible &= corner @ normal + d >= 0
+        return visible
+
+    def spheres_visible(self, centres, radius):
+        """Boolean mask of the (N, 3) sphere centres (shared radius) touching the frustum."""
+        centres = np.asarray(centres, dtype=np.float64)
+        distances = centres @ self.planes[:, :3].T + self.planes[:, 3]
+        return np.all(distances >= -radius, axis=1)
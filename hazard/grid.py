@@ -0,0 +1,121 @@
+"""Array-backed tile map.
+
+The arena used to be a dict keyed by ``(x, y)`` world-coordinate tuples.
+``TileGrid`` stores one byte per cell in a flat ``bytearray`` (row-major,
+row = y) and keeps small side indexes of the cells holding obstacles and
+items, so the renderer and collision code never scan the whole map. The
+dict-style methods (``get``, ``[]``, ``items`` ...) keep old callers working.
+"""
+import numpy as np
+
+# Tile types
+FLOOR = 0
+HOLE = 1
+OBSTACLE = 2
+DIAMOND = 3
+SPEED_BOOST = 4
+EXTRA_LIFE = 5
+PORTAL = 6
+
+# Types tracked in the side indexes (holes are too common to be worth it)
+INDEXED_TYPES = (OBSTACLE, DIAMOND, SPEED_BOOST, EXTRA_LIFE, PORTAL)
+
+
+class TileGrid:
+    """Square grid covering ``[-half_length, half_length)`` around ``centre`` on both axes."""
+
+    def __init__(self, half_length, cell_size, cells=None, centre=(0, 0)):
+        self.half_length = half_length
+        self.cell_size = cell_size
+        self.size = (2 * half_length) // cell_size
+        # World corner of cell 0 (the arena is centred on the origin unless
+        # this is a window onto the endless world)
+        self.x0 = centre[0] - half_length
+        self.y0 = centre[1] - half_length
+        if cells is None:
+            cells = bytearray(self.size * self.size)
+        self.cells = cells
+        self.by_type = {t: set() for t in INDEXED_TYPES}
+        self.reindex()
+
+    @property
+    def array(self):
+        """Writable (size, size) uint8 view of ``cells``, indexed [row, col]."""
+        return np.frombuffer(self.cells, dtype=np.uint8).reshape(self.size, self.size)
+
+    def reindex(self):
+        """Rebuild the side indexes after ``cells`` was filled in bulk."""
+        flat = np.frombuffer(self.cells, dtype=np.uint8)
+        for tile_type in self.by_type:
+            self.by_type[tile_type] = set(np.flatnonzero(flat == tile_type).tolist())
+
+    # Coordinates
+    def index(self, x, y):
+        """Cell index of the cell containing world point (x, y), or -1 if outside."""
+        col = int((x - self.x0) // self.cell_size)
+        row = int((y - self.y0) // self.cell_size)
+        if 0 <= col < self.size and 0 <= row < self.size:
+            return row * self.size + col
+        return -1
+
+    def key(self, i):
+        """World (x, y) corner of cell ``i`` (the old map_data key)."""
+        row, col = divmod(i, self.size)
+        return (col * self.cell_size + self.x0,
+                row * self.cell_size + self.y0)
+
+    def tile_at(self, x, y):
+        i = self.index(x, y)
+        return self.cells[i] if i >= 0 else FLOOR
+
+    def set_index(self, i, tile_type):
+        old = self.cells[i]
+        if old == tile_type:
+            return
+        if old in self.by_type:
+            self.by_type[old].discard(i)
+        if tile_type in self.by_type:
+            self.by_type[tile_type].add(i)
+        self.cells[i] = tile_type
+
+    def cells_of(self, tile_type):
+        """World keys of every cell of an indexed type."""
+        return [self.key(i) for i in self.by_type[tile_type]]
+
+    def special_items(self):
+        """(key, type) for every obstacle, item and portal cell."""
+        for tile_type, indexed in self.by_type.items():
+            for i in indexed:
+                yield self.key(i), tile_type
+
+    # Dict-style shim for code written against the old map_data dict
+    def __getitem__(self, key):
+        i = self.index(*key)
+        if i < 0:
+            raise KeyError(key)
+        return self.cells[i]
+
+    def __setitem__(self, key, tile_type):
+        i = self.index(*key)
+        if i < 0:
+            raise KeyError(key)
+        self.set_index(i, tile_type)
+
+    def get(self, key, default=None):
+        i = self.index(*key)
+        return self.cells[i] if i >= 0 else default
+
+    def __contains__(self, key):
+        return self.index(*key) >= 0
+
+    def __len__(self):
+        return len(self.cells)
+
+    def __iter__(self):
+        return self.keys()
+
+    def keys(self):
+        return (self.key(i) for i in range(len(self.cells)))
+
+    def items(self):
+        return ((self.key(i), t) for i, t in enumerate(self.cells))
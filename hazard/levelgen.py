@@ -0,0 +1,153 @@
+"""Vectorized procedural level generation.
+
+All per-cell random numbers for a level are drawn in one batched NumPy
+call and holes, obstacles, items and moving-object spawns are derived with
+array masks. The probability rules are the ones the old per-cell loop in
+``init_map()`` used, so for a given seed the layout is reproducible and the
+tile distribution matches the original generator.
+"""
+import struct
+
+import numpy as np
+
+from hazard.grid import (FLOOR, HOLE, OBSTACLE, DIAMOND, SPEED_BOOST,
+                         EXTRA_LIFE, PORTAL)
+from hazard.movers import MovingObjects
+
+SAFE_ZONE = 150 # Cells with -150 < x, y < 150 are always floor
+MOVER_RANGE = 200
+MOVER_SPEED = 2.0
+# Level.to_bytes(): header, then the tile bytes, then one record per mover
+LEVEL_HEADER = struct.Struct('<HIHiiI') # level, half_length, cell_size, portal x, portal y, movers
+MOVER_DTYPE = np.dtype([('kind', 'u1'), ('axis', 'u1'), ('pos', '<f8', 2),
+                        ('range_min', '<f8'), ('range_max', '<f8'), ('vel', '<f8')])
+PORTAL_CHUNK_CHANCE = 0.08 # Endless mode: about one chunk in twelve holds a portal
+SEED_MASK = (1 << 64) - 1 # Game seeds are unsigned 64-bit, as in the snapshot and replay headers
+
+
+class Level:
+    """Output of generate_level(): raw tile bytes plus spawned entities."""
+
+    def __init__(self, level, half_length, cell_size, tiles, moving_objects, portal_pos):
+        self.level = level
+        self.half_length = half_length
+        self.cell_size = cell_size
+        self.tiles = tiles # (size, size) uint8 array, row = y
+        self.moving_objects = moving_objects
+        self.portal_pos = portal_pos
+
+    def to_bytes(self):
+        """Compact serialized form, e.g. for handing a level across processes."""
+        movers = self.moving_objects
+        records = np.empty(len(movers), dtype=MOVER_DTYPE)
+        for name in MOVER_DTYPE.names:
+            records[name] = getattr(movers, name)
+        return (LEVEL_HEADER.pack(self.level, self.half_length, self.cell_size, *self.portal_pos,
+                                  len(movers)) +
+                self.tiles.tobytes() + records.tobytes())
+
+    @classmethod
+    def from_bytes(cls, data):
+        level, half_length, cell_size, px, py, count = LEVEL_HEADER.unpack_from(data)
+        size = (2 * half_length) // cell_size
+        offset = LEVEL_HEADER.size
+        tiles = np.frombuffer(data, dtype=np.uint8, count=size * size, offset=offset)
+        records = np.frombuffer(data, dtype=MOVER_DTYPE, count=count, offset=offset + size * size)
+        # Copies: the mover arrays are updated in place every tick
+        moving_objects = MovingObjects(*(records[name].copy() for name in
+                                         ('kind', 'pos', 'axis', 'range_min', 'range_max', 'vel')))
+        return cls(level, half_length, cell_size, tiles.reshape(size, size),
+                   moving_objects, (px, py))
+
+
+def level_seed(game_seed, serial):
+    """Seed for the ``serial``-th map generated in a game."""
+    return np.random.SeedSequence([game_seed & SEED_MASK, serial]).generate_state(1)[0]
+
+
+def _roll_cells(level, rng, xs, ys):
+    """Tiles and moving objects for the cells whose corners are ``xs`` (1, n) x ``ys`` (n, 1)."""
+    n = xs.shape[1]
+
+    # Scale difficulty: More holes as levels increase
+    hole_prob = 0.10 + (level * 0.02)
+    obstacle_prob = 0.15
+
+    # One batched draw: tile roll, item roll, mover type roll, mover axis roll
+    roll, item_roll, type_roll, axis_roll = rng.random((4, n, n))
+
+    # Safe zone (starting area)
+    open_cells = ~((np.abs(xs) < SAFE_ZONE) & (np.abs(ys) < SAFE_ZONE))
+
+    # Level 3+ Dynamic Objects (2.5% chance); they leave plain floor behind
+    if level >= 3:
+        dynamic = open_cells & (roll < 0.025)
+    else:
+        dynamic = np.zeros_like(open_cells)
+    static = open_cells & ~dynamic
+
+    tiles = np.full((n, n), FLOOR, dtype=np.uint8)
+    tiles[static & (roll < hole_prob)] = HOLE
+    tiles[static & (roll >= hole_prob) & (roll < obstacle_prob)] = OBSTACLE
+
+    # Items overwrite whatever tile was rolled underneath them
+    tiles[static & (item_roll < 0.03)] = DIAMOND
+    tiles[static & (item_roll >= 0.03) & (item_roll < 0.035)] = SPEED_BOOST
+    tiles[static & (item_roll >= 0.035) & (item_roll < 0.037)] = EXTRA_LIFE
+
+    # Moving objects start on their spawn cell and patrol +-200 along one axis
+    rows, cols = np.nonzero(dynamic)
+    mx = xs[0, cols].astype(np.float64)
+    my = ys[rows, 0].astype(np.float64)
+    # Determine type: wall (L3+) or hole (L4+)
+    if level >= 4:
+        kind = np.where(type_roll[rows, cols] < 0.5, HOLE, OBSTACLE)
+    else:
+        kind = np.full(len(rows), OBSTACLE)
+    axis = np.where(axis_roll[rows, cols] < 0.5, 0, 1)
+    start = np.where(axis == 0, mx, my)
+    moving_objects = MovingObjects(kind, np.column_stack((mx, my)), axis,
+                                   start - MOVER_RANGE, start + MOVER_RANGE,
+                                   np.full(len(rows), MOVER_SPEED))
+    return tiles, moving_objects
+
+
+def generate_level(level, seed, half_length, cell_size):
+    rng = np.random.default_rng(seed)
+    coords = np.arange(-half_length, half_length, cell_size)
+    tiles, moving_objects = _roll_cells(level, rng, coords[np.newaxis, :], coords[:, np.newaxis])
+
+    # Force Spawn Portal far away
+    px = half_length - 100
+    py = half_length - 100
+    tiles[(py + half_length) // cell_size, (px + half_length) // cell_size] = PORTAL
+
+    return Level(level, half_length, cell_size, tiles, moving_objects, (px, py))
+
+
+def chunk_seed(world_seed, cx, cy):
+    """Seed for chunk (cx, cy) of an endless world; any visiting order gives the same chunk."""
+    # SeedSequence entropy must be non-negative: zigzag-encode the coordinates
+    return np.random.SeedSequence([world_seed, 2 * cx if cx >= 0 else -2 * cx - 1,
+                                   2 * cy if cy >= 0 else -2 * cy - 1]).generate_state(1)[0]
+
+
+def generate_chunk(level, seed, cx, cy, chunk_cells, cell_size):
+    """Tiles (row = y) and moving objects of one endless-mode chunk.
+
+    Same per-cell rules as generate_level(); instead of one far corner
+    portal, a chunk outside the safe zone holds a portal with probability
+    PORTAL_CHUNK_CHANCE.
+    """
+    rng = np.random.default_rng(seed)
+    span = chunk_cells * cell_size
+    coords = np.arange(chunk_cells) * cell_size
+    xs = (cx * span + coords)[np.newaxis, :]
+    ys = (cy * span + coords)[:, np.newaxis]
+    tiles, moving_objects = _roll_cells(level, rng, xs, ys)
+
+    portal_roll, row, col = rng.random(), rng.integers(chunk_cells), rng.integers(chunk_cells)
+    in_safe_zone = abs(xs[0, col]) < SAFE_ZONE and abs(ys[row, 0]) < SAFE_ZONE
+    if portal_roll < PORTAL_CHUNK_CHANCE and not in_safe_zone:
+        tiles[row, col] = PORTAL
+    return tiles, moving_objects
@@ -0,0 +1,57 @@
+"""NumPy geometry for batched drawing.
+
+The scene has no lighting, so a shape is just a list of coloured faces.
+These helpers build the same cubes and spheres GLUT/GLU would draw as
+``GL_QUADS`` vertex arrays, and stamp one template at many positions so
+the renderer can draw a whole class of objects with a single call.
+"""
+import math
+
+import numpy as np
+
+
+def cube_quads(size):
+    """(24, 3) float32 GL_QUADS vertices of a cube centred on the origin."""
+    h = size / 2.0
+    faces = []
+    for axis in range(3):
+        for side in (-h, h):
+            for a, b in ((-h, -h), (h, -h), (h, h), (-h, h)):
+                vertex = [a, b]
+                vertex.insert(axis, side)
+                faces.append(vertex)
+    return np.array(faces, dtype=np.float32)
+
+
+def sphere_quads(radius, slices, stacks):
+    """GL_QUADS vertices of a UV sphere tessellated like gluSphere()."""
+    theta = np.linspace(0.0, 2.0 * math.pi, slices + 1)
+    phi = np.linspace(0.0, math.pi, stacks + 1)
+    quads = []
+    for i in range(stacks):
+        for j in range(slices):
+            for p, t in ((phi[i], theta[j]), (phi[i], theta[j + 1]),
+                         (phi[i + 1], theta[j + 1]), (phi[i + 1], theta[j])):
+                quads.append((radius * math.sin(p) * math.cos(t),
+                              radius * math.sin(p) * math.sin(t),
+                              radius * math.cos(p)))
+    return np.array(quads, dtype=np.float32)
+
+
+def rotation(angle_deg, axis):
+    """3x3 matrix matching glRotatef(angle_deg, *axis)."""
+    x, y, z = np.asarray(axis, dtype=np.float64) / np.linalg.norm(axis)
+    c = math.cos(math.radians(angle_deg))
+    s = math.sin(math.radians(angle_deg))
+    C = 1.0 - c
+    return np.array([
+        [x * x * C + c,     x * y * C - z * s, x * z * C + y * s],
+        [y * x * C + z * s, y * y * C + c,     y * z * C - x * s],
+        [z * x * C - y * s, z * y * C + x * s, z * z * C + c],
+    ])
+
+
+def instance(template, offsets):
+    """Copy ``template`` (V, 3) to every row of ``offsets`` (N, 3) -> (N*V, 3) float32."""
+    offsets = np.asarray(offsets, dtype=np.float32).reshape(-1, 1, 3)
+    return (template[np.newaxis, :, :] + offsets).reshape(-1, 3)
@@ -0,0 +1,66 @@
+"""Struct-of-arrays storage for the Level 3+ moving walls and holes.
+
+Every moving object patrols back and forth along one axis. Instead of a
+list of dicts, the population lives in parallel NumPy arrays so the whole
+set advances and bounces in one vectorized update per tick; collision and
+drawing code index the same arrays.
+"""
+import numpy as np
+
+
+class MovingObjects:
+    def __init__(self, kind, pos, axis, range_min, range_max, vel):
+        self.kind = np.asarray(kind, dtype=np.uint8)          # 2 = wall, 1 = hole
+        # Lower-left corner; kept C-contiguous so pos.reshape(-1) is a view
+        self.pos = np.ascontiguousarray(pos, dtype=np.float64).reshape(-1, 2)
+        self.axis = np.asarray(axis, dtype=np.intp)           # 0 = x, 1 = y
+        self.range_min = np.asarray(range_min, dtype=np.float64)
+        self.range_max = np.asarray(range_max, dtype=np.float64)
+        self.vel = np.asarray(vel, dtype=np.float64)
+        # Index of each object's moving coordinate in pos.reshape(-1)
+        self._moving = np.arange(len(self.kind)) * 2 + self.axis
+
+    @classmethod
+    def empty(cls):
+        return cls([], [], [], [], [], [])
+
+    @classmethod
+    def concatenate(cls, parts):
+        """One population holding copies of ``parts`` back to back."""
+        parts = list(parts)
+        if not parts:
+            return cls.empty()
+        return cls(*(np.concatenate([getattr(p, name) for p in parts])
+                     for name in ('kind', 'pos', 'axis', 'range_min', 'range_max', 'vel')))
+
+    def rows(self, start, stop):
+        """Objects ``start:stop`` as a population sharing this one's arrays (no copy)."""
+        return MovingObjects(self.kind[start:stop], self.pos[start:stop], self.axis[start:stop],
+                             self.range_min[start:stop], self.range_max[start:stop],
+                             self.vel[start:stop])
+
+    def __len__(self):
+        return len(self.kind)
+
+    def advance(self, dt=1.0, active=None, bucket_size=None, size=0.0):
+        """Move every object one tick (``dt`` base ticks long) and bounce those past their range.
+
+        ``active`` optionally masks which objects move this tick. With
+        ``bucket_size``, returns the indices of objects whose ``size``-wide box
+        now spans different buckets (either edge crossed a bucket boundary),
+        so spatial indexes only re-bucket those.
+        """
+        flat = self.pos.reshape(-1)
+        old = flat[self._moving]
+        if active is None:
+            new = old + self.vel * dt
+            bounce = (new > self.range_max) | (new < self.range_min)
+        else:
+            new = old + np.where(active, self.vel * dt, 0.0)
+            bounce = active & ((new > self.range_max) | (new < self.range_min))
+        flat[self._moving] = new
+        self.vel[bounce] *= -1
+        if bucket_size is None:
+            return None
+        return np.flatnonzero((old // bucket_size != new // bucket_size) |
+                              ((old + size) // bucket_size != (new + size) // bucket_size))
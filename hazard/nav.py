@@ -0,0 +1,151 @@
+"""Navigation towards the current goal: remaining diamonds, then the portal.
+
+``FlowField`` stores, for every cell, the BFS distance in cells to the
+nearest goal cell over walkable tiles (anything but holes and obstacles)
+and ``next``, the neighbouring cell one step closer. "Where do I go from
+here" is then a single array lookup, however many bots ask per tick.
+Moving walls and holes are dynamic and, as in ``hazard.analysis``, not
+part of the tile graph.
+
+When a goal is picked up or a cell crumbles, only the cells whose route
+ran through that cell (its subtree in the ``next`` forest) are recomputed,
+with a bucketed Dijkstra seeded from the valid cells around them.
+"""
+import heapq
+
+import numpy as np
+
+from hazard.grid import HOLE, OBSTACLE
+
+# (row, col) steps to the 4 neighbours, in tie-break order
+NEIGHBOURS = ((-1, 0), (1, 0), (0, -1), (0, 1))
+
+
+def neighbours_any(mask):
+    """Cells with at least one 4-neighbour set in ``mask``."""
+    out = np.zeros_like(mask)
+    out[1:, :] |= mask[:-1, :]
+    out[:-1, :] |= mask[1:, :]
+    out[:, 1:] |= mask[:, :-1]
+    out[:, :-1] |= mask[:, 1:]
+    return out
+
+
+def bfs_distances(walkable, start):
+    """4-connected BFS distance in cells from the ``start`` mask; -1 where unreachable.
+
+    Expands the whole frontier with array shifts per step instead of
+    visiting cells one by one.
+    """
+    dist = np.full(walkable.shape, -1, dtype=np.int32)
+    frontier = start & walkable
+    reached = frontier.copy()
+    dist[frontier] = 0
+    step = 0
+    while frontier.any():
+        step += 1
+        frontier = neighbours_any(frontier) & walkable & ~reached
+        reached |= frontier
+        dist[frontier] = step
+    return dist
+
+
+def _shifted(a, dr, dc, fill):
+    # out[r, c] = a[r + dr, c + dc], ``fill`` off the edge
+    out = np.full_like(a, fill)
+    rows, cols = a.shape
+    out[max(-dr, 0):rows - max(dr, 0), max(-dc, 0):cols - max(dc, 0)] = \
+        a[max(dr, 0):rows + min(dr, 0), max(dc, 0):cols + min(dc, 0)]
+    return out
+
+
+class FlowField:
+    def __init__(self, grid, goal_type):
+        self.grid = grid # The TileGrid this field describes
+        self.goal_type = goal_type
+        self.rebuild()
+
+    def rebuild(self):
+        grid = self.grid
+        tiles = grid.array
+        self.walkable = ((tiles != HOLE) & (tiles != OBSTACLE)).reshape(-1)
+        dist = bfs_distances(self.walkable.reshape(tiles.shape), tiles == self.goal_type)
+        nxt = np.full(dist.shape, -1, dtype=np.int32)
+        index = np.arange(dist.size, dtype=np.int32).reshape(dist.shape)
+        for dr, dc in NEIGHBOURS:
+            closer = ((nxt < 0) & (dist > 0) &
+                      (_shifted(dist, dr, dc, -2) == dist - 1))
+            nxt[closer] = _shifted(index, dr, dc, -1)[closer]
+        self.dist = dist.reshape(-1)
+        self.next = nxt.reshape(-1)
+
+    # Queries
+    def next_cell(self, x, y):
+        """Index of the cell to move to from (x, y); -1 at a goal, unreachable or off the grid."""
+        i = self.grid.index(x, y)
+        return int(self.next[i]) if i >= 0 else -1
+
+    def distance_at(self, x, y):
+        """Cells to the nearest goal from (x, y), or -1 if none is reachable."""
+        i = self.grid.index(x, y)
+        return int(self.dist[i]) if i >= 0 else -1
+
+    def route(self, x, y, max_cells=32):
+        """World centres of the next cells on the way to the goal, nearest first."""
+        grid = self.grid
+        half = grid.cell_size / 2
+        points = []
+        i = self.next_cell(x, y)
+        while i >= 0 and len(points) < max_cells:
+            cx, cy = grid.key(i)
+            points.append((cx + half, cy + half))
+            i = int(self.next[i])
+        return points
+
+    # Updates
+    def _neighbours(self, i):
+        size = self.grid.size
+        row, col = divmod(i, size)
+        for dr, dc in NEIGHBOURS:
+            r, c = row + dr, col + dc
+            if 0 <= r < size and 0 <= c < size:
+                yield r * size + c
+
+    def update(self, i):
+        """Catch up with a change of cell ``i`` already written to the grid."""
+        tile_type = self.grid.cells[i]
+        walkable = tile_type != HOLE and tile_type != OBSTACLE
+        was_goal = self.dist[i] == 0
+        if tile_type == self.goal_type and not was_goal or walkable and not self.walkable[i]:
+            self.rebuild() # New goals or new floor never appear in play
+        elif was_goal and tile_type != self.goal_type or self.walkable[i] and not walkable:
+            self.walkable[i] = walkable
+            self._repair(i)
+
+    def _repair(self, root):
+        # Cells whose route ran through ``root``: its subtree in the next forest
+        dist, nxt, walkable = self.dist, self.next, self.walkable
+        stale = [root]
+        for p in stale:
+            stale.extend(q for q in self._neighbours(p) if nxt[q] == p)
+        dist[stale] = -1
+        nxt[stale] = -1
+        stale = set(stale)
+
+        # Dijkstra over the stale cells from their valid neighbours
+        heap = []
+        for p in stale:
+            if walkable[p]:
+                for q in self._neighbours(p):
+                    if dist[q] >= 0:
+                        heap.append((int(dist[q]) + 1, p, q))
+        heapq.heapify(heap)
+        while heap:
+            d, p, q = heapq.heappop(heap)
+            if dist[p] >= 0:
+                continue
+            dist[p] = d
+            nxt[p] = q
+            for r in self._neighbours(p):
+                if r in stale and dist[r] < 0 and walkable[r]:
+                    heapq.heappush(heap, (d + 1, r, p))
@@ -0,0 +1,47 @@
+"""Background generation of upcoming levels.
+
+While a level is played, ``LevelPrefetcher`` builds the maps the next
+``init_map()`` may ask for (the next level through the portal, level 1
+after a restart) in a worker process. Map seeds only depend on the game
+seed and the map serial, so the candidates are known in advance and a
+prefetched level is identical to one generated on the spot. Results come
+back as ``Level.to_bytes()``; if the worker has not finished when the map
+is needed, it is generated synchronously instead.
+"""
+from concurrent.futures import ProcessPoolExecutor
+
+from hazard.levelgen import Level, generate_level
+
+
+def _build(level, seed, half_length, cell_size):
+    # Runs in the worker
+    return generate_level(level, seed, half_length, cell_size).to_bytes()
+
+
+class LevelPrefetcher:
+    def __init__(self, executor=None):
+        self.executor = executor if executor is not None else ProcessPoolExecutor(max_workers=1)
+        self.pending = {} # (level, seed, half_length, cell_size) -> Future
+        self.hits = 0
+        self.misses = 0
+
+    def prefetch(self, level, seed, half_length, cell_size):
+        key = (level, seed, half_length, cell_size)
+        if key not in self.pending:
+            self.pending[key] = self.executor.submit(_build, *key)
+
+    def take(self, level, seed, half_length, cell_size):
+        """The requested level, from the worker if it is ready, else generated here."""
+        future = self.pending.pop((level, seed, half_length, cell_size), None)
+        # The other candidates were for a different next map
+        for stale in self.pending.values():
+            stale.cancel()
+        self.pending.clear()
+        if future is not None and future.done() and not future.cancelled() and future.exception() is None:
+            self.hits += 1
+            return Level.from_bytes(future.result())
+        self.misses += 1
+        return generate_level(level, seed, half_length, cell_size)
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
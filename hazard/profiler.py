@@ -0,0 +1,139 @@
+"""Frame-time profiler for the hot paths.
+
+``Profiler.instrument()`` swaps named module-level functions for timing
+wrappers, so nothing is measured (and nothing costs anything) unless
+profiling was switched on. Durations come from ``time.perf_counter_ns``
+and are kept in a rolling window per phase for p50/p95/p99 reporting.
+GL calls are counted the same way, by wrapping the PyOpenGL functions a
+renderer module imported.
+"""
+import csv
+import functools
+import json
+import math
+import time
+from collections import deque
+
+DEFAULT_WINDOW = 600 # Samples kept per phase (10 s at 60 fps)
+
+
+def percentile(ordered, q):
+    """Nearest-rank percentile of an already sorted sequence."""
+    if not ordered:
+        return 0.0
+    rank = max(1, math.ceil(q / 100.0 * len(ordered)))
+    return ordered[rank - 1]
+
+
+class Profiler:
+    def __init__(self, window=DEFAULT_WINDOW):
+        self.window = window
+        self.samples = {}  # phase -> deque of durations in ns
+        self.calls = {}    # phase -> total calls since start
+        self.gl_calls = 0  # GL calls in the frame being drawn
+        self.gl_calls_per_frame = deque(maxlen=window)
+        self.frames = 0
+        self._hud = []
+
+    def record(self, phase, duration_ns):
+        samples = self.samples.get(phase)
+        if samples is None:
+            samples = self.samples[phase] = deque(maxlen=self.window)
+            self.calls[phase] = 0
+        samples.append(duration_ns)
+        self.calls[phase] += 1
+
+    def timed(self, phase, func):
+        """Wrap ``func`` so every call is recorded under ``phase``."""
+        clock = time.perf_counter_ns
+        record = self.record
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start = clock()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                record(phase, clock() - start)
+        return wrapper
+
+    def instrument(self, namespace, names):
+        """Replace ``namespace[name]`` (a module's globals) with timed wrappers."""
+        for name in names:
+            namespace[name] = self.timed(name, namespace[name])
+
+    def count_gl_calls(self, namespace):
+        """Wrap every PyOpenGL function (GL, GLU, GLUT) in ``namespace`` with a call counter."""
+        from OpenGL import GL, GLU, GLUT # Only windowed runs count GL calls
+        gl_functions = {id(func) for module in (GL, GLU, GLUT) for func in vars(module).values()
+                        if callable(func) and not isinstance(func, type)}
+        for name, func in list(namespace.items()):
+            if id(func) in gl_functions:
+                namespace[name] = self._counted(func)
+
+    def _counted(self, func):
+        def wrapper(*args, **kwargs):
+            self.gl_calls += 1
+            return func(*args, **kwargs)
+        return wrapper
+
+    def end_frame(self):
+        self.gl_calls_per_frame.append(self.gl_calls)
+        self.gl_calls = 0
+        self.frames += 1
+
+    def summary(self):
+        """{phase: {calls, mean_ms, p50_ms, p95_ms, p99_ms}} over the rolling window."""
+        report = {}
+        for phase, samples in self.samples.items():
+            ordered = sorted(samples)
+            report[phase] = {
+                'calls': self.calls[phase],
+                'mean_ms': sum(ordered) / len(ordered) / 1e6,
+                'p50_ms': percentile(ordered, 50) / 1e6,
+                'p95_ms': percentile(ordered, 95) / 1e6,
+                'p99_ms': percentile(ordered, 99) / 1e6,
+            }
+        if self.gl_calls_per_frame:
+            ordered = sorted(self.gl_calls_per_frame)
+            report['gl_calls_per_frame'] = {
+                'calls': self.frames,
+                'mean': sum(ordered) / len(ordered),
+                'p50': percentile(ordered, 50),
+                'p95': percentile(ordered, 95),
+                'p99': percentile(ordered, 99),
+            }
+        return report
+
+    def hud_lines(self, refresh_every=30):
+        """Overlay text, recomputed every ``refresh_every`` frames to keep sorting off the hot path."""
+        if self.frames % refresh_every == 0 or not self._hud:
+            self._hud = self._format_hud()
+        return self._hud
+
+    def _format_hud(self):
+        lines = []
+        for phase, stats in self.summary().items():
+            if phase == 'gl_calls_per_frame':
+                lines.append(f"GL calls/frame p50/p95/p99: {stats['p50']}/{stats['p95']}/{stats['p99']}")
+            else:
+                lines.append(f"{phase} p50/p95/p99: {stats['p50_ms']:.2f}/{stats['p95_ms']:.2f}/"
+                             f"{stats['p99_ms']:.2f} ms")
+        return lines
+
+    def dump(self, path):
+        """Write summary() to ``path`` as CSV (``.csv``) or JSON (anything else)."""
+        report = self.summary()
+        if str(path).endswith('.csv'):
+            with open(path, 'w', newline='') as f:
+                writer = csv.writer(f)
+                writer.writerow(['phase', 'calls', 'mean', 'p50', 'p95', 'p99', 'unit'])
+                for phase, stats in report.items():
+                    unit = 'calls' if phase == 'gl_calls_per_frame' else 'ms'
+                    suffix = '' if unit == 'calls' else '_ms'
+                    writer.writerow([phase, stats['calls']] +
+                                    [stats[key + suffix] for key in ('mean', 'p50', 'p95', 'p99')] +
+                                    [unit])
+        else:
+            with open(path, 'w') as f:
+                json.dump(report, f, indent=2)
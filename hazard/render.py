@@ -0,0 +1,828 @@
+"""GLUT window front end: drawing, camera, HUD and input callbacks.
+
+Everything that needs PyOpenGL lives here. ``hazardball.py`` imports this
+module only when it opens a window, so headless runs, tools and tests never
+pay for the OpenGL import. ``run()`` sets up the game for the parsed
+command line and enters the GLUT main loop.
+"""
+from OpenGL.GL import *
+from OpenGL.GLUT import *
+from OpenGL.GLU import *
+import atexit
+import math
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+from hazard.frustum import Frustum
+from hazard.meshes import cube_quads, instance, rotation, sphere_quads
+from hazard.pregen import LevelPrefetcher
+from hazard.replay import Recorder, Recording, Replayer
+from hazard.snapshot import DEFAULT_PATH, load_map, load_snapshot, save_snapshot
+from hazard.sim import (GRID_CELL_SIZE, ball_radius, GameState, hazard_field, init_map, nav_field,
+                        prefetch_next, step)
+
+# Variables
+W_WIDTH, W_HEIGHT = 1000, 900
+
+fovY = 60
+NEAR_PLANE = 0.1
+FAR_PLANE = 4500
+# First person sees along the floor: stop drawing (and cull) past this, fading
+# out over the last FOG_FRACTION so things do not pop in
+FIRST_PERSON_DRAW_DISTANCE = 1500
+FOG_FRACTION = 0.3
+camera_angle_h = 0.0     
+camera_angle_v = 0.5      
+camera_zoom = 800         
+is_first_person = False   
+show_guide = False # 'G': draw the route to the next diamond / the portal
+GUIDE_CELLS = 12
+
+keys_pressed = set()
+# Key presses received since the last tick, applied by sim.step()
+pending_inputs = []
+
+# Fixed-timestep physics: idle() runs whole ticks of 1/state.tick_rate
+# seconds from an accumulator, and drawing interpolates between the last
+# two ticks by interp_alpha
+MAX_CATCH_UP_TICKS = 5
+last_idle_time = None
+tick_accumulator = 0.0
+interp_alpha = 1.0
+prev_player_pos = None
+prev_mover_pos = None
+prev_grid = None
+
+# Redraw scheduling: frame_timer() pumps the simulation every
+# FRAME_INTERVAL_MS and only asks GLUT for a redraw when the picture
+# changed since the last frame: the ball or a mover moved, the HUD values
+# changed, a tile changed or a tick consumed input (frame_dirty), or the
+# camera / view was changed (request_redraw() from the handlers). Repeated
+# requests coalesce into one. When ticking on cannot change anything (game
+# over, or a resting ball with no movers, power-up or meltdown) the timer
+# is not re-armed, so the process sleeps until an input handler calls wake()
+FRAME_INTERVAL_MS = 1000 // 60
+REDRAW_DISTANCE = 0.01 # World units the ball must move to be worth a frame
+REST_SPEED = 1e-3 # Slower than this (units per base tick) the ball counts as resting
+timer_armed = False
+redraw_pending = False
+frame_dirty = True
+drawn_player_pos = None # What the last frame showed, see scene_changed()
+drawn_mover_pos = None
+drawn_hud = None
+
+# Set by hazardball.enable_profiling() (--profile); None means no instrumentation at all
+profiler = None
+PROFILE_HUD_REFRESH = 30 # Frames between overlay text updates (each new string is a new display list)
+cull_line = None
+# --record logs every tick's inputs; --replay drives the game from a recording
+# instead of the keyboard. At most one of them is set
+recorder = None
+replayer = None
+# F5 saves the current map and progress here (--snapshot-out)
+snapshot_path = DEFAULT_PATH
+
+state = None # The game on screen, set by attach()
+
+# Floor and obstacles are grouped into square chunks so whole regions can
+# be frustum-culled; each chunk owns a contiguous vertex range
+CHUNK_CELLS = 8
+CHUNK_HEIGHT = 50 # Tallest static thing on the floor (obstacle cubes)
+
+# Cached floor mesh: one quad (4 x/y vertices) per cell, rebuilt whenever
+# state.map_data is replaced and patched in place when a single tile changes
+floor_vertices = None
+floor_slots = None  # cell index -> quad slot in floor_vertices
+floor_grid = None
+
+# Per-chunk bounds and vertex ranges, shared by floor and obstacle meshes
+chunk_mins = None
+chunk_maxs = None
+floor_first = None
+floor_count = None
+
+
+def cell_chunks(grid, cells):
+    # Chunk id of each cell index
+    per_row = -(-grid.size // CHUNK_CELLS)
+    rows, cols = np.divmod(cells, grid.size)
+    return (rows // CHUNK_CELLS) * per_row + cols // CHUNK_CELLS
+
+def cell_corners(grid, cells):
+    # (N, 2) lower-left world corners of cell indexes
+    rows, cols = np.divmod(np.asarray(cells, dtype=np.int64), grid.size)
+    corners = np.empty((len(rows), 2), dtype=np.float32)
+    corners[:, 0] = cols * grid.cell_size + grid.x0
+    corners[:, 1] = rows * grid.cell_size + grid.y0
+    return corners
+
+def chunk_ranges(chunk_of_item, n_chunks, verts_per_item):
+    # First vertex and vertex count per chunk for items already sorted by chunk
+    count = np.bincount(chunk_of_item, minlength=n_chunks).astype(np.int32) * verts_per_item
+    first = np.zeros(n_chunks, dtype=np.int32)
+    first[1:] = np.cumsum(count)[:-1]
+    return first, count
+
+def patch_floor_tile(x, y):
+    if floor_grid is not state.map_data:
+        return # Whole mesh gets rebuilt on the next frame anyway
+    i = state.map_data.index(x, y)
+    quad = floor_vertices[floor_slots[i] * 4:floor_slots[i] * 4 + 4]
+    quad[:] = (x, y)
+    if state.map_data.cells[i] != 1: # Holes stay collapsed so nothing is drawn
+        quad[1:3, 0] += GRID_CELL_SIZE
+        quad[2:4, 1] += GRID_CELL_SIZE
+
+def build_floor_mesh():
+    global floor_vertices, floor_slots, floor_grid
+    global chunk_mins, chunk_maxs, floor_first, floor_count
+    grid = state.map_data
+    cells = np.arange(len(grid))
+    chunks = cell_chunks(grid, cells)
+    order = np.argsort(chunks, kind='stable') # slot -> cell
+    floor_slots = np.empty_like(order)
+    floor_slots[order] = cells
+
+    # Quads in slot order; holes collapse onto their corner
+    corners = cell_corners(grid, order)
+    solid = np.frombuffer(grid.cells, dtype=np.uint8)[order] != 1
+    quads = np.repeat(corners[:, np.newaxis, :], 4, axis=1)
+    quads[solid, 1:3, 0] += GRID_CELL_SIZE
+    quads[solid, 2:4, 1] += GRID_CELL_SIZE
+    floor_vertices = quads.reshape(-1, 2)
+    floor_grid = grid
+
+    per_row = -(-grid.size // CHUNK_CELLS)
+    n_chunks = per_row * per_row
+    floor_first, floor_count = chunk_ranges(chunks[order], n_chunks, 4)
+    chunk_rows, chunk_cols = np.divmod(np.arange(n_chunks), per_row)
+    span = CHUNK_CELLS * grid.cell_size
+    chunk_mins = np.zeros((n_chunks, 3))
+    chunk_mins[:, 0] = chunk_cols * span + grid.x0
+    chunk_mins[:, 1] = chunk_rows * span + grid.y0
+    chunk_maxs = chunk_mins + (span, span, CHUNK_HEIGHT)
+    chunk_maxs[:, 0] = np.minimum(chunk_maxs[:, 0], grid.x0 + 2 * grid.half_length)
+    chunk_maxs[:, 1] = np.minimum(chunk_maxs[:, 1], grid.y0 + 2 * grid.half_length)
+
+
+# Batched static geometry: all obstacles of a level in one chunk-ordered
+# vertex array, and per-type item centres so each item class is drawn with
+# one call
+CUBE_20 = cube_quads(20)
+CUBE_50 = cube_quads(50)
+FLAT_CUBE_50 = CUBE_50 * np.float32((1.0, 1.0, 0.1)) # Moving hole
+DIAMOND_MESH = (CUBE_20 @ rotation(45, (1, 1, 0)).T).astype(np.float32)
+SPEED_BOOST_MESH = sphere_quads(15, 20, 20)
+
+# Bounding-sphere radii used when culling single objects
+ITEM_RADIUS = 20
+MOVER_RADIUS = 45
+
+obstacle_vertices = None
+obstacle_first = None
+obstacle_count = None
+item_centres = {}
+batch_grid = None
+items_dirty = True
+
+view_frustum = None
+# Filled in every frame by draw_grid_and_walls()
+cull_stats = {'chunks': 0, 'chunks_total': 0, 'objects': 0, 'objects_total': 0}
+
+
+def cell_centres(cells, z=25):
+    # (N, 3) centres of cell indexes
+    centres = np.empty((len(cells), 3), dtype=np.float32)
+    centres[:, :2] = cell_corners(state.map_data, cells) + GRID_CELL_SIZE / 2
+    centres[:, 2] = z
+    return centres
+
+def rebuild_batches():
+    global obstacle_vertices, obstacle_first, obstacle_count, batch_grid, items_dirty
+    grid = state.map_data
+    if batch_grid is not grid:
+        cells = np.array(sorted(grid.by_type[2]), dtype=np.int64)
+        chunks = cell_chunks(grid, cells)
+        order = np.argsort(chunks, kind='stable')
+        obstacle_vertices = instance(CUBE_50, cell_centres(cells[order]))
+        obstacle_first, obstacle_count = chunk_ranges(chunks[order], len(chunk_mins), len(CUBE_50))
+        batch_grid = grid
+        items_dirty = True
+    if items_dirty:
+        for tile_type in (3, 4, 5):
+            item_centres[tile_type] = cell_centres(sorted(grid.by_type[tile_type]))
+        items_dirty = False
+
+def on_tile_changed(x, y):
+    global items_dirty, frame_dirty
+    patch_floor_tile(x, y)
+    items_dirty = True
+    frame_dirty = True
+
+def attach(game_state):
+    """Show ``game_state`` (its map may still be empty; meshes are rebuilt per map)."""
+    global state
+    state = game_state
+    state.tile_listeners.append(on_tile_changed)
+
+
+# Drawing Functions
+
+# HUD text is rasterized once: every font gets one display list per glyph,
+# and every distinct string one list that replays its glyphs, so a cached
+# string costs a single glCallList(). Changing strings (score, timers) just
+# get a new list; the least recently drawn ones are freed
+HUD_TEXT_CACHE_SIZE = 64
+glyph_bases = {}           # font -> first of its 256 glyph lists
+text_lists = OrderedDict() # (text, font) -> display list, least recent first
+
+def font_key(font):
+    # GLUT font handles are ctypes pointers, which are not hashable
+    return getattr(font, 'value', font)
+
+def glyph_base(font):
+    base = glyph_bases.get(font_key(font))
+    if base is None:
+        base = glGenLists(256)
+        for code in range(256):
+            glNewList(base + code, GL_COMPILE)
+            glutBitmapCharacter(font, code)
+            glEndList()
+        glyph_bases[font_key(font)] = base
+    return base
+
+def text_list(text, font):
+    key = (text, font_key(font))
+    display_list = text_lists.get(key)
+    if display_list is not None:
+        text_lists.move_to_end(key)
+        return display_list
+    if len(text_lists) >= HUD_TEXT_CACHE_SIZE:
+        _, stale = text_lists.popitem(last=False)
+        glDeleteLists(stale, 1)
+    base = glyph_base(font) # Outside glNewList(): lists cannot be nested while compiling
+    display_list = glGenLists(1)
+    glNewList(display_list, GL_COMPILE)
+    glListBase(base)
+    glCallLists(text.encode('latin-1', 'replace'))
+    glEndList()
+    text_lists[key] = display_list
+    return display_list
+
+def begin_hud():
+    """Switch to screen-space projection for the HUD; pair with end_hud()."""
+    glMatrixMode(GL_PROJECTION)
+    glPushMatrix()
+    glLoadIdentity()
+    gluOrtho2D(0, W_WIDTH, 0, W_HEIGHT)
+    glMatrixMode(GL_MODELVIEW)
+    glPushMatrix()
+    glLoadIdentity()
+
+def end_hud():
+    glPopMatrix()
+    glMatrixMode(GL_PROJECTION)
+    glPopMatrix()
+    glMatrixMode(GL_MODELVIEW)
+
+def draw_text(x, y, text, font=GLUT_BITMAP_HELVETICA_12):
+    # Called between begin_hud() and end_hud()
+    glColor3f(1, 1, 1)
+    glRasterPos2f(x, y)
+    glCallList(text_list(text, font))
+
+def draw_bar(x, y, width, height, progress, color=(1.0, 1.0, 1.0)):
+    """Draws a 2D progress bar (between begin_hud() and end_hud())."""
+    # Background (Dark)
+    glColor3f(0.2, 0.2, 0.2)
+    glRectf(x, y, x + width, y + height)
+
+    # Foreground (Progress)
+    glColor3f(*color)
+    glRectf(x, y, x + width * progress, y + height)
+
+# Shared GLU quadric and precompiled display lists (name -> list id).
+# Built once by init_meshes() after the GL context exists; colours are set
+# by the caller so one list serves every tint of a shape.
+quadric = None
+meshes = {}
+
+def compile_mesh(name, draw, *args):
+    mesh = glGenLists(1)
+    glNewList(mesh, GL_COMPILE)
+    draw(*args)
+    glEndList()
+    meshes[name] = mesh
+
+def init_meshes():
+    # GLU and vertex arrays only (no GLUT shapes), so offscreen contexts can build them too
+    global quadric
+    quadric = gluNewQuadric()
+    compile_mesh('player', gluSphere, quadric, ball_radius, 32, 30)
+    compile_mesh('portal', draw_mesh, cube_quads(40))
+
+def draw_chunks(first, count, visible_chunks):
+    # One glMultiDrawArrays over the vertex ranges of the visible chunks
+    if visible_chunks.any():
+        glMultiDrawArrays(GL_QUADS, first[visible_chunks], count[visible_chunks],
+                          int(visible_chunks.sum()))
+
+def cull_spheres(centres, radius):
+    # Keep the centres inside the view frustum and count the rest as culled
+    shown = centres[view_frustum.spheres_visible(centres, radius)]
+    cull_stats['objects'] += len(centres) - len(shown)
+    cull_stats['objects_total'] += len(centres)
+    return shown
+
+def draw_vertex_array(vertices, mode=GL_QUADS):
+    # Needs GL_VERTEX_ARRAY enabled; vertices is an (N, 3) float32 array
+    if len(vertices):
+        glVertexPointer(3, GL_FLOAT, 0, vertices)
+        glDrawArrays(mode, 0, len(vertices))
+
+def draw_mesh(vertices, mode=GL_QUADS):
+    # draw_vertex_array() with the client state handled (display lists copy the vertices)
+    glEnableClientState(GL_VERTEX_ARRAY)
+    draw_vertex_array(vertices, mode)
+    glDisableClientState(GL_VERTEX_ARRAY)
+
+def mover_guide_lines(movers, pos):
+    # Two endpoints per mover spanning its patrol range, 5 units above the floor
+    ends = np.empty((len(movers), 2, 3), dtype=np.float32)
+    along_x = movers.axis == 0
+    for end, bound in ((0, movers.range_min), (1, movers.range_max)):
+        ends[:, end, 0] = np.where(along_x, bound, pos[:, 0] + 25)
+        ends[:, end, 1] = np.where(along_x, pos[:, 1] + 25, bound)
+        ends[:, end, 2] = 5
+    return ends.reshape(-1, 3)
+
+
+def draw_grid_and_walls():
+    time_count = render_time()
+    if floor_grid is not state.map_data:
+        build_floor_mesh()
+    rebuild_batches()
+    
+    # Cull floor/obstacle chunks against the camera; single objects are
+    # culled as they are drawn (cull_spheres)
+    visible_chunks = view_frustum.boxes_visible(chunk_mins, chunk_maxs)
+    cull_stats['chunks'] = int(len(visible_chunks) - visible_chunks.sum())
+    cull_stats['chunks_total'] = len(visible_chunks)
+    cull_stats['objects'] = int(obstacle_count[~visible_chunks].sum()) // len(CUBE_50)
+    cull_stats['objects_total'] = len(obstacle_vertices) // len(CUBE_50)
+
+    glEnableClientState(GL_VERTEX_ARRAY)
+
+    # Draw Floor (cached mesh, holes are collapsed quads)
+    glColor3f(0.15, 0.15, 0.2) # Solid Floor Color (Dark Slate)
+    glVertexPointer(2, GL_FLOAT, 0, floor_vertices)
+    draw_chunks(floor_first, floor_count, visible_chunks)
+
+    # Draw Obstacles (one merged mesh per level)
+    glColor3f(1.0, 0.2, 0.2) # Bright Red
+    if len(obstacle_vertices):
+        glVertexPointer(3, GL_FLOAT, 0, obstacle_vertices)
+        draw_chunks(obstacle_first, obstacle_count, visible_chunks & (obstacle_count > 0))
+
+    # Diamonds share one spin, so rotate the template once per frame
+    glColor3f(0.0, 1.0, 1.0) # Cyan (Points)
+    spin = rotation(time_count * 2, (0, 0, 1))
+    draw_vertex_array(instance((DIAMOND_MESH @ spin.T).astype(np.float32),
+                               cull_spheres(item_centres[3], ITEM_RADIUS)))
+
+    # Power-ups
+    glColor3f(1.0, 0.0, 1.0) # Magenta Speed Boost (Distinct from Player)
+    draw_vertex_array(instance(SPEED_BOOST_MESH, cull_spheres(item_centres[4], ITEM_RADIUS)))
+    glColor3f(0.2, 1.0, 0.2) # Lime Green Extra Life
+    draw_vertex_array(instance(CUBE_20, cull_spheres(item_centres[5], ITEM_RADIUS)))
+
+    # Draw Moving Objects & Guidelines from this frame's positions
+    movers = state.moving_objects
+    if len(movers):
+        mover_pos = render_mover_pos()
+        lines = mover_guide_lines(movers, mover_pos).reshape(-1, 2, 3)
+        lines = lines[view_frustum.boxes_visible(lines.min(axis=1), lines.max(axis=1))]
+        glColor3f(1.0, 1.0, 0.0) # Guide Line (Yellow)
+        draw_vertex_array(lines.reshape(-1, 3), GL_LINES)
+
+        centres = np.empty((len(movers), 3), dtype=np.float32)
+        centres[:, :2] = mover_pos + GRID_CELL_SIZE / 2
+        centres[:, 2] = 25
+        pulse = abs(math.sin(time_count * 0.1))
+
+        # Walls: Pulsing Warning Color, Red to White
+        glColor3f(1.0, pulse, pulse)
+        draw_vertex_array(instance(CUBE_50, cull_spheres(centres[movers.kind == 2], MOVER_RADIUS)))
+        # Moving Holes: flat boxes pulsing Dark Purple
+        glColor3f(pulse * 0.3, 0.0, pulse * 0.3)
+        draw_vertex_array(instance(FLAT_CUBE_50, cull_spheres(centres[movers.kind == 1], MOVER_RADIUS)))
+
+    glDisableClientState(GL_VERTEX_ARRAY)
+
+    # Portal
+    for x, y in state.map_data.cells_of(6):
+        glPushMatrix()
+        # 1. Translate to position
+        glTranslatef(x + GRID_CELL_SIZE/2, y + GRID_CELL_SIZE/2, 25)
+
+        # 2. Rotate in place (if active)
+        if state.diamonds_collected >= state.diamonds_needed:
+            glColor3f(1.0, 0.84, 0.0) # Gold (Active)
+            glRotatef(time_count * 5, 0, 1, 0) # Spin fast
+        else:
+            glColor3f(0.5, 0.5, 0.5) # Grey (Inactive)
+
+        glCallList(meshes['portal']) # Allowed portal shape
+        glPopMatrix()
+
+    # Draw Walls (the endless world has none)
+    if state.endless:
+        return
+    wall_h = 50
+    half = state.grid_length
+    # Steel Blue Walls
+    wall_color = (0.3, 0.4, 0.6) 
+    
+    glColor3f(*wall_color) # Left
+    glBegin(GL_QUADS)
+    glVertex3f(-half, -half, 0); glVertex3f(half, -half, 0)
+    glVertex3f(half, -half, wall_h); glVertex3f(-half, -half, wall_h)
+    glEnd()
+    
+    glColor3f(*wall_color) #Right
+    glBegin(GL_QUADS)
+    glVertex3f(-half, half, 0); glVertex3f(half, half, 0)
+    glVertex3f(half, half, wall_h); glVertex3f(-half, half, wall_h)
+    glEnd()
+
+    glColor3f(*wall_color) #Back
+    glBegin(GL_QUADS)
+    glVertex3f(half, -half, 0); glVertex3f(half, half, 0)
+    glVertex3f(half, half, wall_h); glVertex3f(half, -half, wall_h)
+    glEnd()
+    
+    glColor3f(*wall_color) #Front
+    glBegin(GL_QUADS)
+    glVertex3f(-half, -half, 0); glVertex3f(-half, half, 0)
+    glVertex3f(-half, half, wall_h); glVertex3f(-half, -half, wall_h)
+    glEnd()
+
+def draw_player():
+    player_pos = render_player_pos()
+    
+    glPushMatrix()
+    glTranslatef(player_pos[0], player_pos[1], player_pos[2])
+    
+    if state.falling:
+        glColor3f(1, 0, 0)
+    else:
+        glColor3f(1.0, 0.7, 0.0) # Golden Orange
+        
+    glCallList(meshes['player'])
+    glPopMatrix()
+
+def draw_guide():
+    # Line from the ball through the next GUIDE_CELLS cell centres of its route
+    player_pos = render_player_pos()
+    route = nav_field(state).route(state.player_pos[0], state.player_pos[1], GUIDE_CELLS)
+    if not route:
+        return
+    points = np.empty((len(route) + 1, 3), dtype=np.float32)
+    points[0] = (player_pos[0], player_pos[1], 3)
+    points[1:, :2] = route
+    points[1:, 2] = 3
+    glColor3f(0.2, 1.0, 0.4)
+    draw_mesh(points, GL_LINE_STRIP)
+
+
+def idle():
+    """Run the fixed-timestep ticks due since the last call; returns how many ran."""
+    global last_idle_time, tick_accumulator, interp_alpha, prev_player_pos, prev_mover_pos, prev_grid, frame_dirty
+    now = time.perf_counter()
+    if last_idle_time is None:
+        last_idle_time = now
+    tick_accumulator += now - last_idle_time
+    last_idle_time = now
+
+    tick_seconds = 1.0 / state.tick_rate
+    ticks = 0
+    while tick_accumulator >= tick_seconds and ticks < MAX_CATCH_UP_TICKS:
+        prev_player_pos = list(state.player_pos)
+        prev_mover_pos = state.moving_objects.pos.copy()
+        prev_grid = state.map_data
+        if pending_inputs:
+            frame_dirty = True
+        if replayer:
+            replayer.step(state)
+        elif recorder:
+            recorder.step(state, pending_inputs)
+        else:
+            step(state, pending_inputs)
+        pending_inputs.clear()
+        tick_accumulator -= tick_seconds
+        ticks += 1
+        if replayer and replayer.done:
+            print(f"Replay finished after {replayer.tick} ticks")
+            glutLeaveMainLoop()
+            return ticks
+    if ticks == MAX_CATCH_UP_TICKS:
+        # Too far behind (slow frame, window drag): drop the backlog
+        # instead of spiralling into ever longer catch-up bursts
+        tick_accumulator = min(tick_accumulator, tick_seconds)
+    interp_alpha = tick_accumulator / tick_seconds
+    return ticks
+
+def frame_timer(value=0):
+    global timer_armed
+    idle()
+    if frame_dirty or scene_changed():
+        request_redraw()
+    if at_rest() and not pending_inputs and not replayer:
+        timer_armed = False # Sleep until the next input
+        return
+    glutTimerFunc(FRAME_INTERVAL_MS, frame_timer, 0)
+
+def hud_values():
+    return (state.map_data, state.score, state.lives, state.level, state.diamonds_collected,
+            state.game_over, state.falling, state.powerup_active, state.powerup_timer)
+
+def scene_changed():
+    """Whether the ball, a mover or the HUD moved on since the last frame was drawn."""
+    if drawn_hud != hud_values():
+        return True
+    if any(abs(c - d) > REDRAW_DISTANCE for c, d in zip(render_player_pos(), drawn_player_pos)):
+        return True
+    mover_pos = render_mover_pos()
+    return mover_pos.shape != drawn_mover_pos.shape or not np.array_equal(mover_pos, drawn_mover_pos)
+
+def at_rest():
+    """Whether further ticks would change nothing on screen, so the timer may sleep."""
+    if state.game_over:
+        return True
+    vx, vy = state.player_vel[:2]
+    return (not state.falling and not state.powerup_active and state.level < 5
+            and not len(state.moving_objects) and math.hypot(vx, vy) < REST_SPEED)
+
+def wake():
+    """Re-arm the frame timer after a quiet period (no-op while it runs)."""
+    global timer_armed, last_idle_time
+    if not timer_armed:
+        timer_armed = True
+        last_idle_time = None # The sleep is not simulation time
+        glutTimerFunc(0, frame_timer, 0)
+
+def request_redraw():
+    global redraw_pending
+    if not redraw_pending:
+        redraw_pending = True
+        glutPostRedisplay()
+
+def interpolating():
+    # Skip interpolation across map changes (new level, restart)
+    return prev_player_pos is not None and prev_grid is state.map_data
+
+def render_player_pos():
+    cur = state.player_pos
+    if not interpolating() or any(abs(c - p) > 100 for c, p in zip(cur, prev_player_pos)):
+        return cur # Respawn teleport
+    return [p + (c - p) * interp_alpha for p, c in zip(prev_player_pos, cur)]
+
+def render_mover_pos():
+    movers = state.moving_objects
+    if not interpolating() or prev_mover_pos.shape != movers.pos.shape:
+        return movers.pos
+    return prev_mover_pos + (movers.pos - prev_mover_pos) * interp_alpha
+
+def render_time():
+    # Animation clock in base ticks (the unit the spin/pulse rates were tuned in)
+    if state.game_over or state.time_count == 0:
+        return state.time_count * state.dt
+    return (state.time_count - 1 + interp_alpha) * state.dt
+
+
+#Controls
+def keyboardListener(key, x, y):
+    global show_guide
+    if key in (b'g', b'G'): # View toggle, not a game input
+        show_guide = not show_guide
+        request_redraw()
+        return
+    # Applied on the next tick so live play and headless runs share one path
+    pending_inputs.append(key)
+    wake()
+
+def keyboardUpListener(key, x, y):
+    # Track key release
+    if key in keys_pressed:
+        keys_pressed.remove(key)
+
+def specialKeyListener(key, x, y):
+    global camera_angle_h, camera_angle_v
+    if key == GLUT_KEY_UP:
+        camera_angle_v = min(1.5, camera_angle_v + 0.05)
+    if key == GLUT_KEY_DOWN:
+        camera_angle_v = max(0.1, camera_angle_v - 0.05)
+    if key == GLUT_KEY_RIGHT:
+        camera_angle_h -= 0.05
+    if key == GLUT_KEY_LEFT:
+        camera_angle_h += 0.05
+    if key == GLUT_KEY_F5:
+        save_current_snapshot()
+    request_redraw()
+
+def mouseListener(button, state, x, y):
+    global is_first_person
+    if button == GLUT_RIGHT_BUTTON and state == GLUT_DOWN:
+        is_first_person = not is_first_person
+        request_redraw()
+
+def camera_eye_target():
+    player_pos = render_player_pos()
+    if is_first_person:#first person
+        eyeX = player_pos[0]
+        eyeY = player_pos[1]
+        eyeZ = player_pos[2] + ball_radius + 5#camera at top of the ball
+        
+        
+        targetX = eyeX + math.cos(camera_angle_h) * 200
+        targetY = eyeY + math.sin(camera_angle_h) * 200
+        targetZ = eyeZ + (camera_angle_v - 0.5) * 200 
+    else:
+        
+        eyeX = player_pos[0] - math.cos(camera_angle_h) * camera_zoom#THIRD PERSON
+        eyeY = player_pos[1] - math.sin(camera_angle_h) * camera_zoom
+        eyeZ = camera_zoom * camera_angle_v
+
+        targetX, targetY, targetZ = player_pos[0], player_pos[1], 0
+    return (eyeX, eyeY, eyeZ), (targetX, targetY, targetZ)
+
+def draw_distance():
+    return FIRST_PERSON_DRAW_DISTANCE if is_first_person else FAR_PLANE
+
+def setupCamera():
+    global view_frustum
+    eye, target = camera_eye_target()
+    far = draw_distance()
+    
+    glMatrixMode(GL_PROJECTION)
+    glLoadIdentity()
+    gluPerspective(fovY, W_WIDTH/W_HEIGHT, NEAR_PLANE, far)
+    
+    glMatrixMode(GL_MODELVIEW)
+    glLoadIdentity()
+    gluLookAt(*eye, *target, 0, 0, 1)
+
+    # Fade to the (black) clear colour before the far plane cuts things off
+    if is_first_person:
+        glEnable(GL_FOG)
+        glFogi(GL_FOG_MODE, GL_LINEAR)
+        glFogfv(GL_FOG_COLOR, (0.0, 0.0, 0.0, 1.0))
+        glFogf(GL_FOG_START, far * (1 - FOG_FRACTION))
+        glFogf(GL_FOG_END, far)
+    else:
+        glDisable(GL_FOG)
+
+    # Same camera on the CPU side for culling; the far plane is the draw distance
+    view_frustum = Frustum.from_camera(fovY, W_WIDTH/W_HEIGHT, NEAR_PLANE, far, eye, target)
+
+def draw_scene():
+    """The 3D view of ``state`` without the HUD (shared with hazard.capture)."""
+    glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
+    glLoadIdentity()
+    setupCamera()
+
+    draw_grid_and_walls()
+    draw_player()
+    if show_guide and not state.game_over:
+        draw_guide()
+
+def showScreen():
+    global redraw_pending, cull_line, frame_dirty, drawn_player_pos, drawn_mover_pos, drawn_hud
+    redraw_pending = False
+    frame_dirty = False
+    drawn_player_pos = list(render_player_pos())
+    drawn_mover_pos = np.array(render_mover_pos())
+    drawn_hud = hud_values()
+    draw_scene()
+
+    begin_hud()
+    draw_text(700, 860, "Controls: W,A,S,D Move/Camera control: Arrow keys ")
+    draw_text(700, 880, "Right click: Toggle Camera (1st/3rd Person)")
+    draw_text(700, 840, "G: Toggle route guide | F5: Save snapshot")
+
+    # HUD
+    draw_text(10, 880, f"Score: {state.score}")
+    draw_text(10, 860, f"Lives: {state.lives} | Level: {state.level}")
+    
+    if state.diamonds_collected < state.diamonds_needed:
+        draw_text(10, 780, f"Cores Needed: {state.diamonds_collected}/{state.diamonds_needed}")
+    else:
+        glColor3f(1, 1, 0)
+        draw_text(10, 780, "PORTAL ACTIVE! FIND THE EXIT!")
+
+    danger = hazard_field(state).distance_at(state.player_pos[0], state.player_pos[1])
+    if danger is not None:
+        draw_text(10, 760, f"Nearest hole: {danger} cells")
+        
+    if state.powerup_active:
+        draw_text(10, 840, "SPEED BOOST")
+        # Draw Bar at top left, below text
+        # progress 0.0 to 1.0
+        prog = state.powerup_timer / state.powerup_ticks
+        draw_bar(10, 820, 200, 15, prog, color=(1.0, 0.0, 1.0))
+    
+    if profiler:
+        profiler.end_frame()
+        if cull_line is None or profiler.frames % PROFILE_HUD_REFRESH == 0:
+            cull_line = (f"Culled: {cull_stats['objects']}/{cull_stats['objects_total']} objects, "
+                         f"{cull_stats['chunks']}/{cull_stats['chunks_total']} floor chunks")
+        for i, line in enumerate(profiler.hud_lines(PROFILE_HUD_REFRESH) + [cull_line]):
+            draw_text(620, 820 - i * 18, line)
+
+    if state.game_over:
+        draw_text(400, 800, "GAME OVER! PRESS 'R'")
+    end_hud()
+
+    glutSwapBuffers()
+
+
+def start_prefetcher():
+    # Before glutInit(), so the worker is forked without a GL context
+    state.prefetcher = LevelPrefetcher()
+    prefetch_next(state)
+    atexit.register(state.prefetcher.shutdown)
+
+
+def main():
+    glutInit()
+    glutInitDisplayMode(GLUT_DOUBLE | GLUT_RGB | GLUT_DEPTH)
+    glutInitWindowSize(W_WIDTH, W_HEIGHT)
+    glutInitWindowPosition(100, 10)
+    glutCreateWindow(b"Hazard Ball")
+
+    glEnable(GL_DEPTH_TEST)
+    init_meshes()
+
+    glutDisplayFunc(showScreen)
+    glutKeyboardFunc(keyboardListener)
+    glutSpecialFunc(specialKeyListener)
+
+    glutMouseFunc(mouseListener)
+    wake()
+    # Return from glutMainLoop() on window close so atexit dumps (profile, recording) run
+    glutSetOption(GLUT_ACTION_ON_WINDOW_CLOSE, GLUT_ACTION_GLUTMAINLOOP_RETURNS)
+
+    print("Hazard Ball")
+    print("Press 'R' to restart with a NEW random map.")
+    glutMainLoop()
+
+def start_recording(path):
+    global recorder
+    recorder = Recorder()
+    recorder.start(state)
+    atexit.register(save_recording, path)
+
+def save_recording(path):
+    recorder.save(path)
+    print(f"Recording written to {path} ({recorder.recording.ticks} ticks)")
+
+def start_replay(path):
+    global replayer
+    recording = Recording.load(path)
+    attach(recording.new_state(verbose=True))
+    replayer = Replayer(recording)
+
+def save_current_snapshot():
+    # Between ticks, so the file holds one consistent tick
+    try:
+        save_snapshot(state, snapshot_path)
+    except ValueError as e:
+        print(f"Snapshot not saved: {e}")
+        return
+    print(f"Snapshot written to {snapshot_path} (level {state.level})")
+
+def start_from_snapshot(path):
+    load_map(state, load_snapshot(path))
+    print(f"Loaded snapshot {path} (level {state.level})")
+
+
+def run(args):
+    """Open the game window for parsed ``hazardball.py`` arguments; returns when it closes."""
+    global snapshot_path
+    snapshot_path = args.snapshot_out
+    if args.replay:
+        start_replay(args.replay)
+    else:
+        attach(GameState(seed=args.seed, level=args.level, grid_length=args.grid_length,
+                         tick_rate=args.tick_rate, endless=args.endless))
+        if args.snapshot:
+            start_from_snapshot(args.snapshot)
+        else:
+            init_map(state)
+        if args.record:
+            start_recording(args.record)
+    if not args.no_prefetch:
+        start_prefetcher()
+    main()
@@ -0,0 +1,123 @@
+"""Deterministic input recording and replay.
+
+A game is fully determined by its ``GameState`` settings (seed, starting
+level, arena size, tick rate, endless mode) and the key presses applied on each tick, so
+that is all a recording stores. ``Recorder`` and ``Replayer`` both advance
+the game through ``sim.step()``, the same path live play and headless runs
+use, which makes a replay reproduce the original run tick for tick.
+
+File layout (little endian): a fixed header followed by one 5-byte record
+``(tick uint32, key uint8)`` per key press.
+"""
+import struct
+import time
+
+import numpy as np
+
+from hazard.sim import GameState, init_map, restart, step
+
+MAGIC = b'HZRP'
+VERSION = 1
+# magic, version, flags, seed, level, grid_length, tick_rate, ticks, input count
+HEADER = struct.Struct('<4sBBQHIHII')
+INPUT_DTYPE = np.dtype([('tick', '<u4'), ('key', 'u1')])
+
+FLAG_AUTO_RESTART = 1 # Restart at the starting level on game over (headless walker runs)
+FLAG_ENDLESS = 2
+
+
+class Recording:
+    def __init__(self, seed, level, grid_length, tick_rate, auto_restart=False, ticks=0, inputs=None,
+                 endless=False):
+        self.seed = seed
+        self.level = level
+        self.grid_length = grid_length
+        self.tick_rate = tick_rate
+        self.endless = endless
+        self.auto_restart = auto_restart
+        self.ticks = ticks # Total ticks stepped, including the quiet ones at the end
+        self.inputs = inputs if inputs is not None else [] # [(tick, key bytes)]
+
+    def new_state(self, verbose=False):
+        """A freshly initialised GameState matching the recorded one."""
+        state = GameState(seed=self.seed, level=self.level, verbose=verbose,
+                          grid_length=self.grid_length, tick_rate=self.tick_rate,
+                          endless=self.endless)
+        init_map(state)
+        return state
+
+    def save(self, path):
+        records = np.array([(tick, key[0]) for tick, key in self.inputs], dtype=INPUT_DTYPE)
+        flags = ((FLAG_AUTO_RESTART if self.auto_restart else 0) |
+                 (FLAG_ENDLESS if self.endless else 0))
+        with open(path, 'wb') as f:
+            f.write(HEADER.pack(MAGIC, VERSION, flags, self.seed, self.level, self.grid_length,
+                                self.tick_rate, self.ticks, len(records)))
+            f.write(records.tobytes())
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'rb') as f:
+            data = f.read()
+        magic, version, flags, seed, level, grid_length, tick_rate, ticks, count = \
+            HEADER.unpack_from(data)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path}: not a version {VERSION} Hazard Ball recording")
+        records = np.frombuffer(data, dtype=INPUT_DTYPE, count=count, offset=HEADER.size)
+        inputs = [(tick, bytes((key,))) for tick, key in records.tolist()]
+        return cls(seed, level, grid_length, tick_rate, bool(flags & FLAG_AUTO_RESTART),
+                   ticks, inputs, bool(flags & FLAG_ENDLESS))
+
+
+class Recorder:
+    """Steps a game like ``sim.step()`` while logging every tick's inputs."""
+
+    def __init__(self):
+        self.recording = None
+
+    def start(self, state, auto_restart=False):
+        # Must be called right after init_map(), before the first step
+        self.recording = Recording(state.seed, state.level, state.grid_length, state.tick_rate,
+                                   auto_restart, endless=state.endless)
+
+    def step(self, state, inputs=()):
+        rec = self.recording
+        for key in inputs:
+            rec.inputs.append((rec.ticks, key))
+        step(state, inputs)
+        rec.ticks += 1
+
+    def save(self, path):
+        self.recording.save(path)
+
+
+class Replayer:
+    """Feeds a recording's inputs back into ``sim.step()`` one tick at a time."""
+
+    def __init__(self, recording):
+        self.recording = recording
+        self.by_tick = {}
+        for tick, key in recording.inputs:
+            self.by_tick.setdefault(tick, []).append(key)
+        self.tick = 0
+
+    @property
+    def done(self):
+        return self.tick >= self.recording.ticks
+
+    def step(self, state):
+        if self.recording.auto_restart and state.game_over:
+            restart(state, self.recording.level)
+        step(state, self.by_tick.get(self.tick, ()))
+        self.tick += 1
+
+
+def run_replay(recording):
+    """Replay ``recording`` headless. Returns ``(state, elapsed_seconds)``."""
+    state = recording.new_state()
+    replayer = Replayer(recording)
+    start = time.perf_counter()
+    while not replayer.done:
+        replayer.step(state)
+    elapsed = time.perf_counter() - start
+    return state, elapsed
@@ -0,0 +1,451 @@
+"""Render-free game simulation.
+
+Nothing in this module touches OpenGL or GLUT, so a game can be stepped
+without a window (CI boxes, batch runs) and as fast as the CPU allows.
+The GLUT front end in ``hazard.render`` drives the same functions.
+"""
+import random
+import time
+
+from hazard.collide import first_obstacle_hit, traverse
+from hazard.field import HazardField
+from hazard.grid import DIAMOND, PORTAL, TileGrid
+from hazard.levelgen import SEED_MASK, generate_level, level_seed
+from hazard.movers import MovingObjects
+from hazard.nav import FlowField
+from hazard.snapshot import load_map
+from hazard.spatial import SpatialHash
+from hazard.world import ChunkedWorld
+
+GRID_LENGTH = 1200
+GRID_CELL_SIZE = 50
+
+player_acc = 1.0
+friction = 0.97
+gravity = 1.5
+ball_radius = 20
+
+# Physics constants above are tuned per tick at BASE_TICK_RATE; other tick
+# rates scale motion by dt = BASE_TICK_RATE / tick_rate so gameplay speed
+# does not depend on the tick rate
+BASE_TICK_RATE = 60
+POWERUP_SECONDS = 10.0
+CRUMBLE_SECONDS = 2.0
+
+# Moving-object index buckets span 4x4 cells: a patrolling object re-buckets
+# every ~100 ticks instead of every 25, and a bucket still holds only a few
+MOVER_BUCKET_SIZE = 4 * GRID_CELL_SIZE
+
+
+class GameState:
+    """All mutable state of one game (player, map, progression)."""
+
+    def __init__(self, seed=None, level=1, verbose=True, grid_length=GRID_LENGTH,
+                 tick_rate=BASE_TICK_RATE, endless=False):
+        if seed is None:
+            seed = random.randrange(2**32)
+        self.seed = seed & SEED_MASK # Any int; stored the way it is saved
+        self.rng = random.Random(self.seed)
+        self.verbose = verbose
+        self.grid_length = grid_length
+        self.tick_rate = tick_rate
+        self.dt = BASE_TICK_RATE / tick_rate
+        self.powerup_ticks = round(POWERUP_SECONDS * tick_rate)
+        self.crumble_ticks = round(CRUMBLE_SECONDS * tick_rate)
+        self.maps_generated = 0
+
+        self.player_pos = [0, 0, 20]
+        self.player_vel = [0, 0, 0]
+
+        # Game State
+        self.game_over = False
+        self.falling = False
+        self.time_count = 0
+        self.score = 0
+        self.lives = 3
+        self.powerup_active = False
+        self.powerup_timer = 0
+
+        # Progression
+        self.level = level
+        self.diamonds_collected = 0
+        self.diamonds_needed = 5
+        self.has_won_level = False
+        self.portal_pos = None
+
+        # Level 3-5 Features
+        self.moving_objects = MovingObjects.empty()
+        self.mover_index = SpatialHash(MOVER_BUCKET_SIZE) # ids are moving_objects rows
+        self.crumble_timer = 0
+
+        self.map_data = TileGrid(grid_length, GRID_CELL_SIZE)
+        # Endless mode streams chunks from a ChunkedWorld; map_data is then
+        # only the resident window around the player
+        self.endless = endless
+        self.world = None
+        # Optional hazard.pregen.LevelPrefetcher building upcoming maps ahead of time
+        self.prefetcher = None
+        # Told of single tile edits; a new map is a new map_data object
+        self.tile_listeners = []
+        # HazardField and FlowField of map_data, built on first use (see
+        # hazard_field() and nav_field())
+        self.hazards = None
+        self.nav = None
+
+    def log(self, msg):
+        if self.verbose:
+            print(msg)
+
+    def set_tile(self, i, tile_type):
+        """Change one cell (by TileGrid index) and notify listeners."""
+        self.map_data.set_index(i, tile_type)
+        for field in (self.hazards, self.nav):
+            if field is not None and field.grid is self.map_data:
+                field.update(i)
+        if self.world is not None or self.tile_listeners:
+            x, y = self.map_data.key(i)
+            if self.world is not None:
+                self.world.record(x, y, tile_type)
+            for listener in self.tile_listeners:
+                listener(x, y)
+
+    def index_movers(self):
+        """Rebuild mover_index after moving_objects was replaced."""
+        self.mover_index.clear()
+        self.mover_index.insert_many(self.moving_objects.pos, GRID_CELL_SIZE)
+
+
+def hazard_field(state):
+    """The HazardField of the current map (distance to holes, regions, safe floor).
+
+    Built on first use after a map change and kept current by set_tile(),
+    so bots and the HUD can query it every tick.
+    """
+    if state.hazards is None or state.hazards.grid is not state.map_data:
+        state.hazards = HazardField(state.map_data)
+    return state.hazards
+
+
+def nav_field(state):
+    """FlowField towards the current goal: the remaining diamonds, then the portal.
+
+    Like hazard_field(), built on first use and kept current by set_tile().
+    """
+    goal = PORTAL if state.diamonds_collected >= state.diamonds_needed else DIAMOND
+    if state.nav is None or state.nav.grid is not state.map_data or state.nav.goal_type != goal:
+        state.nav = FlowField(state.map_data, goal)
+    return state.nav
+
+
+def init_map(state, seed=None):
+    """Generate a fresh map for ``state.level``.
+
+    Without an explicit ``seed`` the map seed is derived from the game seed
+    and the number of maps generated so far, so a seeded game is fully
+    reproducible.
+    """
+    if seed is None:
+        seed = level_seed(state.seed, state.maps_generated)
+    state.maps_generated += 1
+    if state.endless:
+        # Chunks around the player are generated now, the rest on the way
+        state.world = ChunkedWorld(seed, state.level, GRID_CELL_SIZE)
+        state.world.recentre(state)
+        state.portal_pos = None
+    else:
+        if state.prefetcher is not None:
+            lvl = state.prefetcher.take(state.level, seed, state.grid_length, GRID_CELL_SIZE)
+        else:
+            lvl = generate_level(state.level, seed, state.grid_length, GRID_CELL_SIZE)
+        state.map_data = TileGrid(lvl.half_length, lvl.cell_size, bytearray(lvl.tiles.tobytes()))
+        state.moving_objects = lvl.moving_objects
+        state.index_movers()
+        state.portal_pos = lvl.portal_pos
+    state.diamonds_collected = 0
+    state.has_won_level = False
+    state.crumble_timer = 0
+
+    if state.prefetcher is not None:
+        prefetch_next(state)
+
+
+def prefetch_next(state):
+    """Queue the maps the next init_map() may need: next level (portal) or level 1 (restart)."""
+    if state.endless:
+        return # Chunks are generated on demand anyway
+    seed = level_seed(state.seed, state.maps_generated)
+    for level in (state.level + 1, 1):
+        state.prefetcher.prefetch(level, seed, state.grid_length, GRID_CELL_SIZE)
+
+
+def respawn(state):
+    state.falling = False
+    state.player_pos = [0, 0, 20]
+    state.player_vel = [0, 0, 0]
+
+
+def restart(state, level=1):
+    state.score = 0
+    state.lives = 3
+    state.game_over = False
+    state.level = level # Reset level
+    state.powerup_active = False
+    state.powerup_timer = 0
+    respawn(state)
+
+    init_map(state)
+    state.log(f"Game Restarted (Level {level})")
+
+
+def apply_input(state, key):
+    # Discrete Input Logic (one impulse per key press)
+    eff_acc = player_acc
+    if state.powerup_active: eff_acc *= 2.0
+
+    vel = state.player_vel
+    if not state.game_over and not state.falling:
+        if key == b'w': vel[0] += eff_acc
+        if key == b's': vel[0] -= eff_acc
+        if key == b'a': vel[1] += eff_acc
+        if key == b'd': vel[1] -= eff_acc
+
+    if key == b'r':#reset
+        restart(state)
+
+
+# Physics
+def check_collisions(state, start=None):
+    """Resolve this tick's move of the ball from ``start`` (x, y) to ``state.player_pos``.
+
+    Every cell the centre crossed is checked in order (holes, items,
+    portal) and the ball stops where its edge first touches an obstacle,
+    so fast balls cannot tunnel at any tick rate. Without ``start`` only
+    the cell under the ball is checked.
+    """
+    pos = state.player_pos
+    vel = state.player_vel
+    dt = state.dt
+    # Endless mode has no boundary walls
+    edge = float('inf') if state.endless else state.grid_length - ball_radius
+
+    if pos[0] > edge:#hit with Boundaries
+        pos[0] = edge
+        vel[0] *= -0.8#bounce back
+    elif pos[0] < -edge:
+        pos[0] = -edge
+        vel[0] *= -0.8
+
+    if pos[1] > edge:
+        pos[1] = edge
+        vel[1] *= -0.8
+    elif pos[1] < -edge:
+        pos[1] = -edge
+        vel[1] *= -0.8
+
+    # hit with holes or obstecal, along the whole path of this tick
+    grid = state.map_data
+    sx, sy = start if start is not None else (pos[0], pos[1])
+    dx, dy = pos[0] - sx, pos[1] - sy
+    path = traverse(grid, sx, sy, dx, dy)
+    t_wall = first_obstacle_hit(grid, sx, sy, dx, dy, ball_radius, path)
+    if t_wall is not None:
+        path = traverse(grid, sx, sy, dx, dy, t_wall)
+
+    for cell, t_enter, t_exit in path:
+        tile_type = grid.cells[cell] if cell >= 0 else 0
+
+        if tile_type == 1: # Hole: drop from the middle of the crossed stretch
+            t = (t_enter + t_exit) / 2
+            pos[0] = sx + dx * t
+            pos[1] = sy + dy * t
+            state.falling = True
+            return
+        elif tile_type == 2: # Obstacle under the centre (pushed in by a moving wall)
+            vel[0] *= -1.2#bounce back
+            vel[1] *= -1.2
+            pos[0] += vel[0] * 2 * dt
+            pos[1] += vel[1] * 2 * dt
+            break
+        elif tile_type == 3: # Diamond
+            state.score += 10
+            state.diamonds_collected += 1
+            state.set_tile(cell, 0) # Remove item
+            state.log(f"Score: {state.score} | Diamonds: {state.diamonds_collected}/{state.diamonds_needed}")
+        elif tile_type == 4: # Speed Boost
+            state.powerup_active = True
+            state.powerup_timer = state.powerup_ticks
+            state.set_tile(cell, 0)
+            state.log("Speed Boost Activated!")
+        elif tile_type == 5: # Extra Life
+            state.lives += 1
+            state.set_tile(cell, 0)
+            state.log(f"Extra Life! Lives: {state.lives}")
+        elif tile_type == 6: # Portal
+            if state.diamonds_collected >= state.diamonds_needed:
+                # Level Complete!
+                state.log(f"Level {state.level} Complete!")
+                state.level += 1
+                state.game_over = False
+                respawn(state)
+                init_map(state)
+                return
+            else:
+                state.log(f"Portal Locked! Need {state.diamonds_needed - state.diamonds_collected} more cores.")
+    else:
+        if t_wall is not None: # Stop where the ball touches the obstacle and bounce back
+            pos[0] = sx + dx * t_wall
+            pos[1] = sy + dy * t_wall
+            vel[0] *= -1.2
+            vel[1] *= -1.2
+
+    collide_movers(state)
+
+
+def collide_movers(state):
+    # Collision with Moving Objects (only those sharing the player's cell)
+    pos = state.player_pos
+    dt = state.dt
+    movers = state.moving_objects
+    for i in state.mover_index.query_point(pos[0], pos[1]):
+        ox, oy = movers.pos[i].tolist()
+        # Simple AABB
+        if (pos[0] > ox and pos[0] < ox + GRID_CELL_SIZE and
+            pos[1] > oy and pos[1] < oy + GRID_CELL_SIZE):
+
+            if movers.kind[i] == 2: # Moving Wall -> Push
+                # Push player in direction of movement
+                pos[movers.axis[i]] += float(movers.vel[i]) * dt
+            elif movers.kind[i] == 1: # Moving Hole -> Fall
+                state.falling = True
+
+
+def update(state):
+    """Advance the game by one tick (the old GLUT idle() body)."""
+    if state.game_over:
+        return
+    update_player(state)
+    advance_movers(state)
+    update_meltdown(state)
+
+
+def update_player(state):
+    # Ball physics and collisions for one tick
+    state.time_count += 1
+    dt = state.dt
+
+    if state.falling:
+        state.player_pos[2] -= gravity * 4 * dt
+        state.player_vel[0] *= 0.99 ** dt
+        state.player_vel[1] *= 0.99 ** dt
+        if state.player_pos[2] < -700:
+            fell_out(state)
+    else:
+        # Handle Power-up Timer
+        current_friction = friction
+        if state.powerup_active:
+            if state.powerup_timer > 0:
+                state.powerup_timer -= 1
+                current_friction = 0.985 # Less friction
+            else:
+                end_powerup(state)
+
+        current_friction **= dt
+        state.player_vel[0] *= current_friction
+        state.player_vel[1] *= current_friction
+
+        start = (state.player_pos[0], state.player_pos[1])
+        state.player_pos[0] += state.player_vel[0] * dt
+        state.player_pos[1] += state.player_vel[1] * dt
+
+        check_collisions(state, start)
+
+    # Endless mode: stream in the chunks around the player's new position
+    if state.world is not None:
+        state.world.follow(state)
+
+
+def fell_out(state):
+    # The ball dropped below the arena: respawn or end the game
+    if state.lives > 0:
+        # Respawn logic
+        state.lives -= 1
+        respawn(state)
+        state.log(f"Respawned! Lives left: {state.lives}")
+    else:
+        state.game_over = True
+
+
+def end_powerup(state):
+    state.powerup_active = False
+    state.log("Speed Boost Ended")
+
+
+def advance_movers(state):
+    # Update Moving Objects (one vectorized step for the whole population)
+    movers = state.moving_objects
+    if len(movers):
+        for i in movers.advance(state.dt, bucket_size=MOVER_BUCKET_SIZE,
+                                size=GRID_CELL_SIZE).tolist():
+            x, y = movers.pos[i].tolist()
+            state.mover_index.move(i, x, y)
+
+
+def update_meltdown(state):
+    # Level 5: Meltdown
+    if state.level >= 5 and not state.falling and not state.game_over:
+        state.crumble_timer += 1
+        if state.crumble_timer > state.crumble_ticks: # Every ~2 seconds
+            state.crumble_timer = 0
+            crumble(state)
+
+
+def crumble(state):
+    # Destroy a random floor cell in the 3x3 safe-cell blocks around the player
+    field = hazard_field(state)
+    row, col = field.cell(state.player_pos[0], state.player_pos[1])
+    target = field.safe.sample_near(row, col, state.rng)
+    if target >= 0:
+        state.set_tile(target, 1) # Turning into Hole!
+
+
+def step(state, inputs=()):
+    """Apply this tick's key presses (e.g. b'w', b'r') and advance one tick."""
+    for key in inputs:
+        apply_input(state, key)
+    update(state)
+
+
+def run_headless(ticks, seed=None, level=1, grid_length=GRID_LENGTH, tick_rate=BASE_TICK_RATE,
+                 endless=False, recorder=None, snapshot=None):
+    """Step a game for ``ticks`` ticks with a seeded random walker.
+
+    The game restarts on game over so every tick does real work. A
+    ``hazard.replay.Recorder`` passed as ``recorder`` logs the walker's
+    inputs. A ``hazard.snapshot.Snapshot`` replaces the first generated
+    map, and restarts go back to its level. Returns ``(state, elapsed_seconds)``.
+    """
+    state = GameState(seed=seed, level=level, verbose=False, grid_length=grid_length,
+                      tick_rate=tick_rate, endless=endless)
+    if snapshot is not None:
+        load_map(state, snapshot)
+        level = state.level # Restart where the snapshot was taken
+    else:
+        init_map(state)
+    advance = step
+    if recorder is not None:
+        recorder.start(state, auto_restart=True)
+        advance = recorder.step
+    walker = random.Random(state.seed)
+    moves = (b'w', b'a', b's', b'd')
+    press_every = max(1, tick_rate // 4) # A key press every quarter second
+
+    start = time.perf_counter()
+    for tick in range(ticks):
+        if state.game_over:
+            restart(state, level)
+        if tick % press_every == 0:
+            advance(state, (walker.choice(moves),))
+        else:
+            advance(state)
+    elapsed = time.perf_counter() - start
+    return state, elapsed
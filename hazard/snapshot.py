@@ -0,0 +1,84 @@
+"""Binary level snapshots.
+
+A snapshot pins a map (curated levels, big custom arenas) so it can be
+played again without running the generator. Layout, little endian:
+
+    SNAPSHOT_HEADER   magic, format version, game seed, maps generated,
+                      score, lives, diamonds collected / needed
+    Level.to_bytes()  level metadata and portal, raw tile bytes (one per
+                      cell, row = y), one MOVER_DTYPE record per mover
+
+``load_snapshot()`` memory-maps the file copy-on-write and hands the tile
+bytes to ``TileGrid`` as a view, so a large arena is usable without being
+read up front, and tiles changed in play never touch the file.
+"""
+import mmap
+import random
+import struct
+
+from hazard.grid import TileGrid
+from hazard.levelgen import Level
+
+DEFAULT_PATH = "hazardball.hzl" # Where the game's F5 key saves
+MAGIC = b'HZLV'
+VERSION = 1
+# magic, version, seed, maps generated, score, lives, diamonds collected, diamonds needed
+SNAPSHOT_HEADER = struct.Struct('<4sHQIiHHH')
+
+
+class Snapshot:
+    def __init__(self, lvl, seed, maps_generated, score, lives, diamonds_collected, diamonds_needed):
+        self.level = lvl # levelgen.Level; tiles is a view of the mapped file
+        self.seed = seed
+        self.maps_generated = maps_generated
+        self.score = score
+        self.lives = lives
+        self.diamonds_collected = diamonds_collected
+        self.diamonds_needed = diamonds_needed
+
+
+def save_snapshot(state, path):
+    """Write the current map (items collected, floor crumbled) and progress to ``path``."""
+    if state.endless:
+        raise ValueError("endless worlds are streamed in chunks and cannot be snapshotted")
+    grid = state.map_data
+    lvl = Level(state.level, grid.half_length, grid.cell_size, grid.array,
+                state.moving_objects, state.portal_pos)
+    with open(path, 'wb') as f:
+        f.write(SNAPSHOT_HEADER.pack(MAGIC, VERSION, state.seed, state.maps_generated, state.score,
+                                     state.lives, state.diamonds_collected, state.diamonds_needed))
+        f.write(lvl.to_bytes())
+
+
+def load_snapshot(path):
+    with open(path, 'rb') as f:
+        # Private mapping: pages are read on first touch, writes stay in memory
+        data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+    magic, version, *fields = SNAPSHOT_HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise ValueError(f"{path} is not a Hazard Ball level snapshot")
+    if version != VERSION:
+        raise ValueError(f"{path}: unsupported snapshot version {version}")
+    lvl = Level.from_bytes(memoryview(data)[SNAPSHOT_HEADER.size:])
+    return Snapshot(lvl, *fields)
+
+
+def load_map(state, snapshot):
+    """init_map() counterpart: put ``snapshot``'s map and progress into ``state``."""
+    lvl = snapshot.level
+    state.seed = snapshot.seed
+    state.rng = random.Random(snapshot.seed)
+    state.maps_generated = snapshot.maps_generated
+    state.level = lvl.level
+    state.grid_length = lvl.half_length
+    # 1-D byte view of the mapped tiles, indexed like the usual bytearray
+    state.map_data = TileGrid(lvl.half_length, lvl.cell_size, memoryview(lvl.tiles).cast('B'))
+    state.moving_objects = lvl.moving_objects
+    state.index_movers()
+    state.portal_pos = lvl.portal_pos
+    state.score = snapshot.score
+    state.lives = snapshot.lives
+    state.diamonds_collected = snapshot.diamonds_collected
+    state.diamonds_needed = snapshot.diamonds_needed
+    state.has_won_level = False
+    state.crumble_timer = 0
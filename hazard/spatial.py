@@ -0,0 +1,97 @@
+"""Uniform-grid spatial index for moving walls and holes.
+
+Each object is an axis-aligned square registered in every grid bucket its
+box overlaps (at most four when the box is one cell wide). Moving an object
+only touches the buckets when it crosses a cell boundary, and "what overlaps
+this point" is a single bucket lookup instead of a scan over every object.
+"""
+from collections import defaultdict
+
+import numpy as np
+
+
+class SpatialHash:
+    def __init__(self, cell_size):
+        self.cell_size = cell_size
+        self.buckets = defaultdict(set) # (col, row) -> object ids; empty buckets are kept
+        self.spans = {}   # object id -> (col0, row0, col1, row1, size)
+
+    def clear(self):
+        self.buckets.clear()
+        self.spans.clear()
+
+    def __len__(self):
+        return len(self.spans)
+
+    def _span(self, x, y, size):
+        cs = self.cell_size
+        return (int(x // cs), int(y // cs), int((x + size) // cs), int((y + size) // cs), size)
+
+    def _link(self, oid, span):
+        col0, row0, col1, row1, _ = span
+        buckets = self.buckets
+        for col in range(col0, col1 + 1):
+            for row in range(row0, row1 + 1):
+                buckets[(col, row)].add(oid)
+
+    def _unlink(self, oid, span):
+        col0, row0, col1, row1, _ = span
+        buckets = self.buckets
+        for col in range(col0, col1 + 1):
+            for row in range(row0, row1 + 1):
+                buckets[(col, row)].discard(oid)
+
+    def insert(self, oid, x, y, size):
+        """Register object ``oid`` covering the square [x, x+size) x [y, y+size)."""
+        span = self._span(x, y, size)
+        self.spans[oid] = span
+        self._link(oid, span)
+
+    def insert_many(self, pos, size):
+        """Register objects 0..n-1 with lower-left corners ``pos`` (n, 2) at once.
+
+        Same buckets (and per-bucket insertion order) as calling insert()
+        for each row, with the span maths and bucket grouping vectorized.
+        """
+        if not len(pos):
+            return
+        cs = self.cell_size
+        lo = np.floor_divide(pos, cs).astype(np.int64)
+        hi = np.floor_divide(pos + size, cs).astype(np.int64)
+        self.spans.update(enumerate(zip(lo[:, 0].tolist(), lo[:, 1].tolist(),
+                                        hi[:, 0].tolist(), hi[:, 1].tolist(), [size] * len(pos))))
+        # (col, row, id) for every bucket each object overlaps
+        ids = np.arange(len(pos))
+        cols, rows, oids = [], [], []
+        for dc in range(int((hi[:, 0] - lo[:, 0]).max(initial=0)) + 1):
+            for dr in range(int((hi[:, 1] - lo[:, 1]).max(initial=0)) + 1):
+                ok = (lo[:, 0] + dc <= hi[:, 0]) & (lo[:, 1] + dr <= hi[:, 1])
+                cols.append(lo[ok, 0] + dc)
+                rows.append(lo[ok, 1] + dr)
+                oids.append(ids[ok])
+        cols, rows, oids = np.concatenate(cols), np.concatenate(rows), np.concatenate(oids)
+        order = np.lexsort((oids, rows, cols)) # Ids ascending within a bucket
+        cols, rows, oids = cols[order], rows[order], oids[order]
+        starts = np.flatnonzero(np.diff(cols, prepend=cols[0] - 1) | np.diff(rows, prepend=rows[0] - 1))
+        buckets = self.buckets
+        oids = oids.tolist()
+        bounds = starts.tolist() + [len(oids)]
+        for col, row, a, b in zip(cols[starts].tolist(), rows[starts].tolist(), bounds, bounds[1:]):
+            buckets[(col, row)].update(oids[a:b])
+
+    def remove(self, oid):
+        self._unlink(oid, self.spans.pop(oid))
+
+    def move(self, oid, x, y):
+        """Update ``oid``'s position; a no-op unless it crossed a cell boundary."""
+        old = self.spans[oid]
+        span = self._span(x, y, old[4])
+        if span != old:
+            self._unlink(oid, old)
+            self.spans[oid] = span
+            self._link(oid, span)
+
+    def query_point(self, x, y):
+        """Ids (ascending) of objects whose bucket contains (x, y); callers do the exact test."""
+        cs = self.cell_size
+        return sorted(self.buckets.get((int(x // cs), int(y // cs)), ()))
@@ -0,0 +1,136 @@
+"""Endless mode: a streaming world made of deterministic chunks.
+
+The world is cut into ``CHUNK_CELLS`` x ``CHUNK_CELLS`` chunks, each one
+generated on demand from the world seed and its chunk coordinates, so it
+does not matter in which order they are visited. Only a window of
+``WINDOW_CHUNKS`` x ``WINDOW_CHUNKS`` chunks around the player is resident
+in the game state (``state.map_data`` is a ``TileGrid`` over that window
+and ``state.moving_objects`` holds its movers); the window is rebuilt when
+the player crosses into another chunk. Recently used chunks stay cached up
+to ``MAX_CACHED_CHUNKS`` and the least recently used ones are dropped.
+
+Tiles the player changed (collected items, crumbled floor) are logged in a
+``DeltaStore`` and replayed onto a chunk whenever it is generated again.
+Moving objects of an evicted chunk restart from their spawn positions.
+"""
+import struct
+from collections import OrderedDict
+
+import numpy as np
+
+from hazard.grid import TileGrid
+from hazard.levelgen import chunk_seed, generate_chunk
+from hazard.movers import MovingObjects
+
+CHUNK_CELLS = 16
+WINDOW_CHUNKS = 5        # Odd, so the player's chunk is in the middle
+MAX_CACHED_CHUNKS = 64
+
+
+class DeltaStore:
+    """Player-made tile changes, per chunk, as packed (uint16 cell, uint8 tile) records."""
+
+    RECORD = struct.Struct('<HB')
+
+    def __init__(self):
+        self.logs = {} # (cx, cy) -> bytearray of records, applied in order
+
+    def record(self, chunk, cell, tile_type):
+        self.logs.setdefault(chunk, bytearray()).extend(self.RECORD.pack(cell, tile_type))
+
+    def apply(self, chunk, flat_tiles):
+        log = self.logs.get(chunk)
+        if log:
+            for cell, tile_type in self.RECORD.iter_unpack(log):
+                flat_tiles[cell] = tile_type
+
+    @property
+    def nbytes(self):
+        return sum(len(log) for log in self.logs.values())
+
+
+class Chunk:
+    def __init__(self, tiles, moving_objects):
+        self.tiles = tiles # (CHUNK_CELLS, CHUNK_CELLS) uint8, row = y
+        self.moving_objects = moving_objects
+
+
+class ChunkedWorld:
+    def __init__(self, seed, level, cell_size, chunk_cells=CHUNK_CELLS, window=WINDOW_CHUNKS,
+                 max_chunks=MAX_CACHED_CHUNKS):
+        if max_chunks < window * window:
+            raise ValueError("the chunk cache must hold at least one full window")
+        self.seed = seed
+        self.level = level
+        self.cell_size = cell_size
+        self.chunk_cells = chunk_cells
+        self.span = chunk_cells * cell_size
+        self.window = window
+        self.max_chunks = max_chunks
+        self.chunks = OrderedDict() # (cx, cy) -> Chunk, least recently used first
+        self.deltas = DeltaStore()
+        self.centre = None          # Chunk the resident window is centred on
+        self.window_movers = []     # (chunk key, first, stop) rows of state.moving_objects
+        self.chunks_generated = 0
+
+    def chunk_of(self, x, y):
+        return (int(x // self.span), int(y // self.span))
+
+    def chunk(self, key):
+        chunk = self.chunks.get(key)
+        if chunk is not None:
+            self.chunks.move_to_end(key)
+            return chunk
+        tiles, moving_objects = generate_chunk(self.level, chunk_seed(self.seed, *key), *key,
+                                               self.chunk_cells, self.cell_size)
+        self.deltas.apply(key, tiles.reshape(-1))
+        chunk = self.chunks[key] = Chunk(tiles, moving_objects)
+        self.chunks_generated += 1
+        if len(self.chunks) > self.max_chunks:
+            self.chunks.popitem(last=False)
+        return chunk
+
+    def follow(self, state):
+        """Re-centre the resident window if the player entered another chunk."""
+        pos = state.player_pos
+        if self.chunk_of(pos[0], pos[1]) != self.centre:
+            self.recentre(state)
+
+    def recentre(self, state):
+        # Keep mover progress of chunks that stay cached
+        movers = state.moving_objects
+        for key, first, stop in self.window_movers:
+            chunk = self.chunks.get(key)
+            if chunk is not None:
+                chunk.moving_objects.pos[:] = movers.pos[first:stop]
+                chunk.moving_objects.vel[:] = movers.vel[first:stop]
+
+        self.centre = self.chunk_of(state.player_pos[0], state.player_pos[1])
+        r = self.window // 2
+        cc = self.chunk_cells
+        tiles = np.empty((self.window * cc, self.window * cc), dtype=np.uint8)
+        parts = []
+        self.window_movers = []
+        first = 0
+        for j in range(self.window):
+            for i in range(self.window):
+                key = (self.centre[0] - r + i, self.centre[1] - r + j)
+                chunk = self.chunk(key)
+                tiles[j * cc:(j + 1) * cc, i * cc:(i + 1) * cc] = chunk.tiles
+                parts.append(chunk.moving_objects)
+                self.window_movers.append((key, first, first + len(chunk.moving_objects)))
+                first += len(chunk.moving_objects)
+
+        half = self.window * self.span // 2
+        centre = ((self.centre[0] - r) * self.span + half, (self.centre[1] - r) * self.span + half)
+        state.map_data = TileGrid(half, self.cell_size, bytearray(tiles.tobytes()), centre)
+        state.moving_objects = MovingObjects.concatenate(parts)
+        state.index_movers()
+
+    def record(self, x, y, tile_type):
+        """Log a tile change made in the resident window."""
+        key = self.chunk_of(x, y)
+        col = int(x // self.cell_size) - key[0] * self.chunk_cells
+        row = int(y // self.cell_size) - key[1] * self.chunk_cells
+        self.chunks[key].tiles[row, col] = tile_type
+        self.deltas.record(key, row * self.chunk_cells + col, tile_type)